@@ -4,46 +4,42 @@
 #---------------------------------------------------------
 #import libraries
 #---------------------------------------------------------
-from fastapi import FastAPI
-from pydantic import BaseModel
-import joblib
-import spacy
-import sqlite3
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+import json
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from task_db import task_db, MAX_PAGE_SIZE
 from db_management import save_to_db, process_user_command
-import re
+from model_registry import prewarm, model_stats, model_version, models_ready, version_stats
+from inference_cache import classify, classify_many, cache_stats as inference_cache_stats, pre_router_stats, coalescer_stats, request_coalescer
 from datetime import datetime, timedelta
-import dateparser
-from google_integration import get_calendar_service, list_upcoming_events, add_task_to_calendar, get_existing_schedule
+from temporal_parser import parse_datetime, extract_clock_time, cache_stats
+from google_integration import get_calendar_service, list_upcoming_events, add_task_to_calendar, add_tasks_to_calendar, get_existing_schedule
+from schedule_cache import get_cached_index
+from interval_index import IntervalIndex
+from scheduler import find_free_slot, schedule_batch
+from keyword_matcher import first_keyword
+from priority_scorer import smart_reasoning_engine
+from reprioritizer import reprioritizer
+from inference_pool import inference_pool, start_inference_pool, inference_pool_stats, MAX_BATCH as POOL_MAX_BATCH
+import coalescer
+from stage_metrics import timed, stage_stats, metrics_text, start_request_timings, stop_request_timings, format_timings
 #---------------------------------------------------------
-# connect to database
+# database
 #---------------------------------------------------------
-DB_NAME = "tasks.db"
-# Connect to the database
-conn = sqlite3.connect(DB_NAME)
-cursor = conn.cursor()
-
-# Create the table if it doesn't exist
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS tasks (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    task TEXT,
-    deadline TEXT,
-    priority TEXT,
-    location TEXT,
-    recurrence TEXT,
-    duration TEXT,
-    intent TEXT
-)
-""")
-conn.commit()
-conn.close()
-
-
-#---------------------------------------------------------
-# load models
-#---------------------------------------------------------
-intent_clf = joblib.load("models/intent_classifier.pkl")
-entity_clf = spacy.load("models/entity_clf")
+# task_db keeps one connection per thread and creates the table on first use
+DB_NAME = task_db.path
+DEFAULT_PAGE_SIZE = 100
+AUTO_RESCHEDULE = True   # move conflicting tasks to the next free slot before adding them to the calendar
+STAGE_TIMINGS_HEADER = False   # debug: add an X-Stage-Timings header (ms per pipeline stage) to every response
+MAX_BATCH_PROCESSES = 4   # most spaCy worker processes one /process_tasks/batch request may start
+MAX_SPACY_BATCH = 1000    # largest batch_size a /process_tasks/batch request may ask for
 
 
 #---------------------------------------------------------
@@ -51,6 +47,30 @@ entity_clf = spacy.load("models/entity_clf")
 #---------------------------------------------------------
 app = FastAPI(title="Task NLP API")
 
+# models are loaded once by model_registry; warm them in the background at startup
+# so the server accepts traffic right away (/health) and reports /ready once they are in
+@app.on_event("startup")
+def warm_models():
+    prewarm()
+
+# stored priority scores are raised in the background as deadlines get within 48h / 24h
+@app.on_event("startup")
+def start_reprioritizer():
+    reprioritizer.start()
+
+# with STAGE_TIMINGS_HEADER on, every stage a request runs is listed in its X-Stage-Timings header
+@app.middleware("http")
+async def stage_timings_header(request: Request, call_next):
+    if not STAGE_TIMINGS_HEADER:
+        return await call_next(request)
+    timings, token = start_request_timings()
+    try:
+        response = await call_next(request)
+    finally:
+        stop_request_timings(token)
+    response.headers["X-Stage-Timings"] = format_timings(timings)
+    return response
+
 #---------------------------------------------------------
 # Input schema
 #---------------------------------------------------------
@@ -58,16 +78,19 @@ class UserCommand(BaseModel):
     command: str
 
 
+class BatchCommands(BaseModel):
+    commands: List[str]
+    batch_size: int = Field(64, ge=1, le=MAX_SPACY_BATCH)   # docs per spaCy batch
+    n_process: int = Field(1, ge=1, le=MAX_BATCH_PROCESSES)  # spaCy worker processes
+
+
 #---------------------------------------------------------
 # helper functions
 #---------------------------------------------------------
 #extract priority
 def extract_priority_fallback(text):
-    priorities = ["high", "low", "urgent", "critical", "medium"]
-    for p in priorities:
-        if p in text.lower():
-            return p
-    return None
+    priority, _ = first_keyword(text, "explicit_priority")
+    return priority
 
 # infer priority in case its not given in statement
 def infer_priority(task_description):
@@ -75,12 +98,11 @@ def infer_priority(task_description):
     task_lower = task_description.lower()
 
     # 1. Detect explicit times (e.g., 11pm, 7:30am) 
-    time_match = re.search(r'\b(\d{1,2})(?::(\d{2}))?\s?(am|pm)\b', task_lower)
-    if time_match:
+    if extract_clock_time(task_lower):
         score += 50  # Time-bound = high priority
 
     # 2. Detect dates / deadlines
-    date_obj = dateparser.parse(task_lower, settings={'PREFER_DATES_FROM': 'future'})
+    date_obj = parse_datetime(task_lower)
     if date_obj:
         delta = date_obj - datetime.now()
         if delta.days < 1:
@@ -88,10 +110,9 @@ def infer_priority(task_description):
         elif delta.days < 3:
             score += 20
 
-    # 3. Detect critical keywords
-    critical_keywords = ["meeting", "submit", "exam", "deadline", "presentation", "midnight", "assignment"]
-    if any(word in task_lower for word in critical_keywords):
-        score += 20
+    # 3. Detect critical keywords (weights in keywords.json)
+    _, weight = first_keyword(task_lower, "critical")
+    score += weight
 
     # Map score to priority
     if score >= 70:
@@ -104,47 +125,25 @@ def infer_priority(task_description):
     return priority, score
 
 from datetime import datetime
-import pytz
 
 def is_conflicting(new_start, new_end, schedule):
-    """Check if new task conflicts with existing schedule (timezone-safe)."""
-    # Force new times to be timezone-aware (Asia/Karachi here)
-    if new_start.tzinfo is None:
-        new_start = new_start.replace(tzinfo=pytz.timezone("Asia/Karachi"))
-    if new_end.tzinfo is None:
-        new_end = new_end.replace(tzinfo=pytz.timezone("Asia/Karachi"))
-
-    for event in schedule:
-        start = event["start"]
-        end = event["end"]
-
-        # Convert existing events to timezone-aware if needed
-        if start.tzinfo is None:
-            start = start.replace(tzinfo=pytz.timezone("Asia/Karachi"))
-        if end.tzinfo is None:
-            end = end.replace(tzinfo=pytz.timezone("Asia/Karachi"))
-
-        if new_start < end and new_end > start:
-            return True
-
-    return False
+    """
+    Check if new task conflicts with existing schedule (timezone-safe).
+    schedule can be an IntervalIndex or a list of events; naive times are treated as Asia/Karachi.
+    """
+    index = schedule if isinstance(schedule, IntervalIndex) else IntervalIndex(schedule)
+    return index.overlaps_any(new_start, new_end)
 
 
-def infer_priority_with_conflict(task_description, duration_minutes=60):
+def infer_priority_with_conflict(task_description, duration_minutes=60, existing_schedule=None):
     score = 0
     task_lower = task_description.lower()
 
     # 1. Extract time from task
-    time_match = re.search(r'\b(\d{1,2})(?::(\d{2}))?\s?(am|pm)\b', task_lower)
+    clock_time = extract_clock_time(task_lower)
     start_time = None
-    if time_match:
-        hour = int(time_match.group(1))
-        minute = int(time_match.group(2) or 0)
-        meridian = time_match.group(3)
-        if meridian == 'pm' and hour != 12:
-            hour += 12
-        elif meridian == 'am' and hour == 12:
-            hour = 0
+    if clock_time:
+        hour, minute = clock_time
         today = datetime.now()
         if today: 
             start_time = today.replace(hour=hour, minute=minute, second=0, microsecond=0)
@@ -153,7 +152,7 @@ def infer_priority_with_conflict(task_description, duration_minutes=60):
             score += 50  # Time-bound tasks are high priority
 
     # 2. Check deadline words
-    date_obj = dateparser.parse(task_lower, settings={'PREFER_DATES_FROM': 'future'})
+    date_obj = parse_datetime(task_lower)
     if date_obj:
         delta = date_obj - datetime.now()
         if delta.days < 1:
@@ -161,17 +160,13 @@ def infer_priority_with_conflict(task_description, duration_minutes=60):
         elif delta.days < 3:
             score += 20
 
-    # 3. Critical keyword detection
-    critical_keywords = ["meeting", "submit", "exam", "deadline", "presentation"]
-    if any(word in task_lower for word in critical_keywords):
-        score += 20
+    # 3. Critical keyword detection (same keyword set as infer_priority)
+    _, weight = first_keyword(task_lower, "critical")
+    score += weight
     
-    service = get_calendar_service()
-    
-
-
-    existing_schedule = get_existing_schedule(service, lookahead_days=7)
-
+    # index over the cached snapshot, built once per calendar sync
+    if existing_schedule is None:
+        existing_schedule = fetch_schedule_index_or_empty()
 
     # 4. Conflict detection
     conflict_bonus = 0
@@ -190,125 +185,7 @@ def infer_priority_with_conflict(task_description, duration_minutes=60):
         priority = "low"
 
     return priority, score
-from datetime import timedelta
-import dateparser
-
-def smart_reasoning_engine(intent, entities, calendar_events, event_status=None, duration_minutes=60):
-    task = entities.get("task", "")
-    user_priority = entities.get("priority")
-    deadline = entities.get("deadline") or entities.get("time")
-
-    # --- Initialize ---
-    score = 0
-    reasoning_steps = []
-    start_time = None
-
-    # --- Expanded Keyword Categories ---
-    critical_keywords = {
-        "meeting": ["meeting", "call", "sync", "discussion"],
-        "deadline": ["submit", "deadline", "due", "turn in"],
-        "urgent": ["urgent", "important", "critical", "asap", "immediately"],
-        "exam": ["exam", "test", "quiz", "assessment"],
-        "presentation": ["presentation", "slides", "demo", "pitch"]
-    }
-
-    # -------------------------------------------------------
-    # 1️⃣ Direct User Priority
-    # -------------------------------------------------------
-    if user_priority:
-        priority_map = {"low": 20, "medium": 50, "high": 80}
-        score += priority_map.get(user_priority.lower(), 40)
-        reasoning_steps.append(f"**Priority:** User specified `{user_priority.upper()}` → score {score}.")
-    else:
-        reasoning_steps.append("**Priority:** No user priority specified, inferring logically...")
-
-    # -------------------------------------------------------
-    # 2️⃣ Deadline / Time Sensitivity
-    # -------------------------------------------------------
-    if deadline:
-        parsed_time = dateparser.parse(deadline, settings={'PREFER_DATES_FROM':'future'})
-        if parsed_time:
-            start_time = parsed_time
-            hours_until_deadline = (start_time - timedelta()).total_seconds() / 3600
-
-            # Deadline-based scoring
-            if hours_until_deadline <= 24:
-                score += 50
-                urgency_label = "urgent (<24h)"
-            elif hours_until_deadline <= 48:
-                score += 30
-                urgency_label = "soon (<48h)"
-            else:
-                score += 10
-                urgency_label = "distant"
-            reasoning_steps.append(f"**Deadline:** `{parsed_time}` → {urgency_label}, score {score}.")
-
-    # -------------------------------------------------------
-    # 3️⃣ Keyword-Based Importance
-    # -------------------------------------------------------
-    if task:
-        for category, words in critical_keywords.items():
-            if any(word in task.lower() for word in words):
-                weight = 30 if category == "urgent" else 15
-                score += weight
-                reasoning_steps.append(f"**Keyword:** Task mentions `{category}` → +{weight} points, score {score}.")
-                break
-
-    # -------------------------------------------------------
-    # 4️⃣ Calendar Conflict Detection
-    # -------------------------------------------------------
-    conflict_detected = False
-    if start_time and calendar_events:
-        end_time = start_time + timedelta(minutes=duration_minutes)
-        for event in calendar_events:
-            if start_time < event["end"] and end_time > event["start"]:
-                score += 20
-                conflict_detected = True
-                reasoning_steps.append(f"**Conflict:** Overlaps with `{event['title']}` → urgency increased, score {score}.")
-                break
-
-    # -------------------------------------------------------
-    # 5️⃣ Compute Final Priority
-    # -------------------------------------------------------
-    if score >= 60:
-        final_priority = "high"
-    elif score >= 40:
-        final_priority = "medium"
-    else:
-        final_priority = "low"
-
-    reasoning_steps.append(f"**Final Decision:** `{final_priority.upper()}` priority (score: {score}).")
-
-    # -------------------------------------------------------
-    # 6️⃣ Reflect Actual Calendar Action
-    # -------------------------------------------------------
-    schedule_on_calendar = (
-        intent in ["Add Task", "Set Priority", "Set Deadline"]
-        and final_priority in ["high", "medium"]
-    )
-
-    # Reflect backend status if provided
-    if event_status and event_status.get("success"):
-        reasoning_steps.append("**Action:** Task successfully added to Google Calendar ✅")
-    elif schedule_on_calendar:
-        reasoning_steps.append("**Action:** Task will be added to Google Calendar.")
-    else:
-        reasoning_steps.append("**Action:** Task not added to calendar automatically.")
-
-    # --- Format reasoning for Streamlit ---
-    formatted_reasoning = "\n".join([f"- {step}" for step in reasoning_steps])
-
-    return {
-        "task": task,
-        "final_priority": final_priority,
-        "reasoning": formatted_reasoning,
-        "schedule_on_calendar": schedule_on_calendar,
-        "score": score
-    }
-
-import re
 from datetime import datetime, timedelta
-import dateparser
 
 def resolve_start_time(time_str):
     """
@@ -320,12 +197,9 @@ def resolve_start_time(time_str):
         dt = datetime.now().replace(minute=0, second=0, microsecond=0)
         return dt
 
-    # Remove ordinal suffixes like 1st, 2nd, 3rd, 4th, etc.
-    # Example: "5th August" -> "5 August"
-    time_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', time_str, flags=re.IGNORECASE)
-
-    # Use dateparser to handle natural language time expressions
-    parsed_time = dateparser.parse(time_str, settings={'PREFER_DATES_FROM': 'future'})
+    # parse_datetime strips ordinal suffixes ("5th August" -> "5 august") and caches
+    # the result, so the same deadline parsed in smart_reasoning_engine is free
+    parsed_time = parse_datetime(time_str)
     
     if parsed_time:
         return parsed_time
@@ -342,46 +216,398 @@ def resolve_start_time(time_str):
 def home():
     return {"message": "Task NLP API is running!"}
 
+# liveness: the process is up and serving requests
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+# readiness: the models are loaded, requests won't wait for a model load
+@app.get("/ready")
+def ready():
+    models = model_stats()
+    if not models_ready():
+        return JSONResponse(status_code=503, content={"status": "loading", "models": models})
+    return {"status": "ready", "models": models}
+
+# load time and memory of the shared models
+@app.get("/model_stats/")
+def get_model_stats():
+    return model_stats()
+
+# active model version, whether a new one is being swapped in, and the manifests of every trained version
+@app.get("/model_versions/")
+def get_model_versions():
+    return version_stats()
+
+# hit / miss counters of the date parsing cache
+@app.get("/parser_stats/")
+def get_parser_stats():
+    return cache_stats()
+
+# hit rate and time saved by the intent / NER result cache
+@app.get("/inference_cache_stats/")
+def get_inference_cache_stats():
+    return inference_cache_stats()
+
+# how many commands the rule-based pre-router answered, and how often it agrees with the models
+@app.get("/pre_router_stats/")
+def get_pre_router_stats():
+    return pre_router_stats()
+
+# scheduled deadline crossings and how many stored scores the background worker changed
+@app.get("/reprioritizer_stats/")
+def get_reprioritizer_stats():
+    return reprioritizer.stats()
+
+# batches and commands handled by the inference worker processes
+@app.get("/inference_pool_stats/")
+def get_inference_pool_stats():
+    return inference_pool_stats()
+
+# batch sizes and queue wait of the single-command request coalescer
+@app.get("/coalescer_stats/")
+def get_coalescer_stats():
+    return coalescer_stats()
+
+# count, error rate and p50 / p95 / p99 per pipeline stage (intent, ner, dateparser, calendar calls, ...)
+@app.get("/stage_stats/")
+def get_stage_stats():
+    return stage_stats()
+
+# the same stage histograms in Prometheus text format
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(metrics_text() + request_coalescer.prometheus(), media_type="text/plain; version=0.0.4")
+
 # get all tasks
 @app.get("/get_tasks/")
-def get_tasks():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    c.execute("SELECT * FROM tasks")
-    rows = c.fetchall()
-    conn.close()
-    
-    # Convert rows to list of dictionaries
-    tasks = []
-    for row in rows:
-        tasks.append({
-            "id": row[0],
-            "task": row[1],
-            "deadline": row[2],
-            "priority": row[3],
-            "location": row[4],
-            "recurrence": row[5],
-            "duration": row[6],
-            "intent": row[7]
-        })
-    
-    return {"tasks": tasks}
+def get_tasks(
+    request: Request,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None,
+    priority: Optional[str] = None,
+    intent: Optional[str] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    sort: str = "id",
+    format: str = "json"
+):
+    """
+    Keyset-paginated task list. Pass the returned next_after_id as after_id to get the next page.
+    sort is one of id, priority_score (highest first) or deadline (soonest first).
+    With format=ndjson (or Accept: application/x-ndjson) every matching row is streamed, one JSON object per line.
+    """
+    filters = {
+        "priority": priority,
+        "intent": intent,
+        "deadline_from": deadline_from.timestamp() if deadline_from else None,
+        "deadline_to": deadline_to.timestamp() if deadline_to else None,
+    }
+
+    try:
+        if format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+            rows = task_db.iter_tasks(sort=sort, after_id=after_id, limit=limit, **filters)
+            lines = (json.dumps(row) + "\n" for row in rows)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+
+        # the page size the DB applies, so a short page really means the end of the list
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        tasks = task_db.query_tasks(limit=limit, sort=sort, after_id=after_id, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    next_after_id = tasks[-1]["id"] if len(tasks) == limit else None
+    return {"tasks": tasks, "next_after_id": next_after_id, "limit": limit}
 
 
 from datetime import datetime, timedelta
 from fastapi import APIRouter
 
-@app.post("/process_task/")
 def process_task(user_input: str):
+    """Blocking version of the pipeline, used directly by the Streamlit frontends."""
+    started_at = time.perf_counter()
+
+    with timed("process_task"):
+        # Step 1 + 2: Get intent as string and extract entities
+        intent, entities = classify_command(user_input)
+        return build_task_data(user_input, intent, entities, started_at=started_at)
 
-    # Step 1: Get intent as string
-    intent = intent_clf.predict([user_input])[0]
-    print(f"Intent: {intent}")
 
-    # Step 2: Extract entities
-    doc = entity_clf(user_input)           
-    entities_dict = {ent.label_: ent.text for ent in doc.ents}
+def classify_command(user_input):
+    # repeated commands are answered by the inference cache
+    with timed("classify"):
+        result = classify(user_input)
+    print(f"Intent: {result['intent']}")
+    return result["intent"], result["entities"]
+
+
+#---------------------------------------------------------
+# async pipeline
+#---------------------------------------------------------
+MODEL_WORKERS = 2          # inference threads, bounded so CPU work can't take over the server
+INFERENCE_WORKERS = 0      # worker processes for intent + NER (inference_pool.py), 0 = run the models in this process
+IO_WORKERS = 8             # threads for blocking Google API calls
+INFERENCE_TIMEOUT = 10     # seconds, per stage
+SCHEDULE_TIMEOUT = 5
+CALENDAR_TIMEOUT = 10
+
+# with the process pool or the request coalescer these threads mostly wait for a shared model call,
+# so there are enough of them to fill a batch (the model work itself stays on one thread / the workers)
+if INFERENCE_WORKERS:
+    MODEL_THREADS = INFERENCE_WORKERS * POOL_MAX_BATCH
+elif coalescer.ENABLED:
+    MODEL_THREADS = coalescer.MAX_BATCH
+else:
+    MODEL_THREADS = MODEL_WORKERS
+model_executor = ThreadPoolExecutor(max_workers=MODEL_THREADS, thread_name_prefix="inference")
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="calendar-io")
+
+
+@app.on_event("startup")
+def start_workers():
+    # don't hold up startup: commands queue in the pool until the workers have loaded the models
+    if INFERENCE_WORKERS:
+        start_inference_pool(INFERENCE_WORKERS, wait=False)
+
+
+@app.on_event("shutdown")
+def stop_executors():
+    inference_pool.stop()
+    model_executor.shutdown(wait=False)
+    io_executor.shutdown(wait=True)
+    reprioritizer.stop()
+
+
+async def run_stage(executor, timeout, func, *args, **kwargs):
+    """Runs a blocking function in executor and gives up waiting after timeout seconds."""
+    loop = asyncio.get_running_loop()
+    # run inside a copy of the request's context so the stages it times land in X-Stage-Timings
+    call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+
+
+def fetch_schedule_index(service=None):
+    with timed("schedule_fetch"):
+        return get_cached_index(service or get_calendar_service())
+
+
+def fetch_schedule_index_or_empty(service=None):
+    """The schedule index, or an empty one when the calendar can't be reached, so the task still gets a priority and is saved."""
+    try:
+        return fetch_schedule_index(service)
+    except Exception as e:
+        # no calendar, still answer with a priority (without conflict checks)
+        print("Calendar schedule unavailable, skipping conflict checks:", repr(e))
+        return IntervalIndex([])
+
+
+def insert_calendar_event(calendar_task):
+    """Event status of one insert. A calendar that can't be reached (no credentials.json, auth error,
+    missing client libraries) gives a failed status instead of an exception, so the task is still saved."""
+    try:
+        return add_task_to_calendar(get_calendar_service(), calendar_task)
+    except Exception as e:
+        print("Error adding event to Google Calendar:", e)
+        return {"success": False, "link": None, "error": str(e), "event_id": None}
+
+
+def insert_and_persist(task_data, calendar_task, started_at):
+    # fire-and-forget path: runs after the response has been sent
+    try:
+        task_data["event_status"] = insert_calendar_event(calendar_task)
+    finally:
+        persist_task(task_data, calendar_task, started_at)
+
+
+@app.post("/process_task/")
+async def process_task_endpoint(user_input: str, background_tasks: BackgroundTasks, fire_and_forget: bool = False):
+    """
+    Same result as process_task, but the schedule is fetched while the models run.
+    With fire_and_forget=true the response is returned before the calendar insert finishes.
+    """
+    with timed("process_task"):
+        started_at = time.perf_counter()
+
+        # Step 1: start fetching the calendar while we classify
+        schedule_future = asyncio.ensure_future(run_stage(io_executor, SCHEDULE_TIMEOUT, fetch_schedule_index))
+
+        # Step 2: intent + entities
+        try:
+            intent, entities = await run_stage(model_executor, INFERENCE_TIMEOUT, classify_command, user_input)
+        except asyncio.TimeoutError:
+            schedule_future.cancel()
+            raise HTTPException(status_code=504, detail="Timed out classifying the command")
+
+        try:
+            schedule_index = await schedule_future
+        except Exception as e:
+            # no calendar, still answer with a priority (without conflict checks)
+            print("Calendar schedule unavailable, skipping conflict checks:", repr(e))
+            schedule_index = IntervalIndex([])
+
+        # Step 3: priority and task data
+        task_data = await run_stage(
+            model_executor, INFERENCE_TIMEOUT, build_task_data,
+            user_input, intent, entities, add_to_calendar=False, schedule_index=schedule_index
+        )
+        calendar_task = prepare_calendar_task(task_data, schedule_index if AUTO_RESCHEDULE else None)
+
+        # Step 4: calendar insert, in the background or awaited
+        if fire_and_forget:
+            background_tasks.add_task(insert_and_persist, dict(task_data), calendar_task, started_at)
+            task_data["event_status"] = {"success": None, "link": None, "error": None, "event_id": None, "pending": True}
+            return task_data
+
+        try:
+            task_data["event_status"] = await run_stage(io_executor, CALENDAR_TIMEOUT, insert_calendar_event, calendar_task)
+        except asyncio.TimeoutError:
+            task_data["event_status"] = {"success": False, "link": None, "error": "Timed out waiting for Google Calendar", "event_id": None}
+
+        # Step 5: store the result so reads never re-run inference
+        await run_stage(io_executor, CALENDAR_TIMEOUT, persist_task, task_data, calendar_task, started_at)
+        return task_data
+
+
+@app.post("/process_tasks/batch")
+def process_tasks_batch(batch: BatchCommands):
+    """
+    Runs intent classification and NER over many commands in one pass.
+    Returns {"results": [...]} where each item has the same shape as /process_task/.
+    """
+    commands = batch.commands
+    if not commands:
+        return {"results": []}
+    started_at = time.perf_counter()
+
+    # Step 1-2: cache lookups, then one predict call and one spaCy pass for the misses
+    with timed("classify_batch"):
+        classified = classify_many(commands, batch_size=batch.batch_size, n_process=batch.n_process)
+
+    # Step 3: one schedule lookup for every conflict check and placement in the batch
+    schedule_index = fetch_schedule_index_or_empty()
+    results = []
+    for user_input, result in zip(commands, classified):
+        results.append(build_task_data(user_input, result["intent"], result["entities"],
+                                       add_to_calendar=False, schedule_index=schedule_index))
+
+    # Step 4: insert all events through batched Calendar requests
+    calendar_tasks = [None] * len(results)
+    try:
+        service = get_calendar_service()
+        calendar_tasks = prepare_calendar_tasks(results, schedule_index if AUTO_RESCHEDULE else None)
+        statuses = add_tasks_to_calendar(service, calendar_tasks)
+        for task_data, event_status in zip(results, statuses):
+            task_data["event_status"] = event_status
+    except Exception as e:
+        print("Error adding events to Google Calendar:", e)
+
+    # Step 5: store every result in one bulk insert
+    # (latency is the batch time shared out per command)
+    latency_ms = (time.perf_counter() - started_at) * 1000 / len(results)
+    rows = [task_row(task_data, calendar_task, latency_ms) for task_data, calendar_task in zip(results, calendar_tasks)]
+    with timed("persist"):
+        ids, failures = task_db.insert_tasks(rows)
+    for task_data, task_id in zip(results, ids):
+        task_data["id"] = task_id
+    for position, error in failures:
+        print(f"❌ Database error for command {position}:", error)
+    reprioritizer.track(ids)
+    return {"results": results}
+
+
+def task_row(task_data, calendar_task, latency_ms):
+    """The tasks table row for one processed command."""
+    entities = task_data.get("entities", {})
+    event_status = task_data.get("event_status") or {}
+    start_time = calendar_task["start_time"] if calendar_task else None
+    return {
+        "command": task_data.get("command"),
+        "task": task_data["task"],
+        "deadline": task_data["deadline"],
+        "priority": task_data["priority"],
+        "location": entities.get("LOCATION"),
+        "recurrence": entities.get("RECURRENCE"),
+        "duration": entities.get("DURATION"),
+        "intent": task_data.get("intent"),
+        "priority_score": task_data["score"],
+        "start_ts": start_time.timestamp() if start_time else None,
+        "event_id": event_status.get("event_id"),
+        "event_link": event_status.get("link"),
+        "model_version": model_version(),
+        "latency_ms": round(latency_ms, 2),
+    }
+
+
+def persist_task(task_data, calendar_task, started_at):
+    """Saves one processed command and adds its row id to task_data."""
+    latency_ms = (time.perf_counter() - started_at) * 1000
+    try:
+        with timed("persist"):
+            task_data["id"] = task_db.insert_task(task_row(task_data, calendar_task, latency_ms))
+    except Exception as e:
+        print("❌ Database error:", e)
+        return
+    reprioritizer.track([task_data["id"]])
+
+
+def prepare_calendar_task(task_data, schedule_index=None):
+    """
+    Builds the calendar task for a processed command.
+    If schedule_index is given and the requested time is taken, the task moves to the next free slot.
+    """
+    start_time = resolve_start_time(task_data["deadline"]) or datetime.now() + timedelta(hours=1)
+
+    # move the event to the next free slot instead of booking it on top of another one
+    if schedule_index is not None:
+        if is_conflicting(start_time, start_time + timedelta(minutes=60), schedule_index):
+            free_slot = find_free_slot(schedule_index, start_time, duration_minutes=60)
+            if free_slot:
+                task_data["rescheduled_from"] = start_time.isoformat()
+                start_time = free_slot
+                print(f"Conflict found, moved '{task_data['task']}' to {start_time}")
+
+    return {
+        "title": task_data["task"],
+        "priority": task_data["priority"] or "medium",
+        "start_time": start_time,
+        "duration_minutes": 60
+    }
+
+
+def prepare_calendar_tasks(results, schedule_index=None):
+    """
+    Calendar tasks for a whole batch. With schedule_index the batch is placed by schedule_batch, highest
+    score first: a task keeps its requested time unless it overlaps an event or a task placed before it,
+    then it moves to the next free slot.
+    """
+    calendar_tasks = [prepare_calendar_task(task_data) for task_data in results]
+    if schedule_index is None:
+        return calendar_tasks
+
+    placements = schedule_batch(
+        [
+            {"score": task_data["score"], "start_time": calendar_task["start_time"],
+             "duration_minutes": calendar_task["duration_minutes"]}
+            for task_data, calendar_task in zip(results, calendar_tasks)
+        ],
+        schedule_index,
+        keep_free_starts=True,
+    )
+    for task_data, calendar_task, placed in zip(results, calendar_tasks, placements):
+        # no free slot within the horizon: keep the requested time, like prepare_calendar_task
+        if placed["rescheduled"]:
+            task_data["rescheduled_from"] = calendar_task["start_time"].isoformat()
+            calendar_task["start_time"] = placed["start"]
+            print(f"Conflict found, moved '{task_data['task']}' to {placed['start']}")
+    return calendar_tasks
+
+
+def build_task_data(user_input, intent, entities, add_to_calendar=True, schedule_index=None, started_at=None):
+    """
+    Turns a classified command and its entities ({label: text}) into the task dict returned by the API.
+    With add_to_calendar the event is created and the result saved to the tasks table.
+    """
+    entities_dict = entities
     print("Extracted entities:", entities_dict)
 
     # Step 3: Safely get entity values with fallbacks
@@ -392,9 +618,14 @@ def process_task(user_input: str):
     recurrence = entities_dict.get("RECURRENCE")
     duration = entities_dict.get("DURATION")
 
+    # one schedule lookup for the conflict check and the calendar placement
+    if schedule_index is None and (not priority or (add_to_calendar and AUTO_RESCHEDULE)):
+        schedule_index = fetch_schedule_index_or_empty()
+
     # Step 4: Infer priority if missing
     if not priority:
-        priority, score = infer_priority_with_conflict(user_input, duration_minutes=60)
+        with timed("priority"):
+            priority, score = infer_priority_with_conflict(user_input, duration_minutes=60, existing_schedule=schedule_index)
         print(f"Priority inferred as : {priority}")
     else:
         score = {"low":20, "medium":50, "high":80}.get(priority, 40)
@@ -404,23 +635,30 @@ def process_task(user_input: str):
         "task": task,
         "priority": priority,
         "score": score,
-        "deadline": deadline
+        "deadline": deadline,
+        "command": user_input,
+        "intent": str(intent),
+        "entities": entities_dict
     }
 
     # Step 6: Create event if intent is task-related
-    start_time = resolve_start_time(deadline) or datetime.now() + timedelta(hours=1)
+    # (the batch endpoint skips this and inserts all events together)
+    if not add_to_calendar:
+        return task_data
+
     print("DEBUG: Preparing to add event:", task, deadline)
+    calendar_task = None
     try:
-        event_status = add_task_to_calendar(get_calendar_service(), {
-            "title": task,
-            "priority": priority or "medium",
-            "start_time": start_time,
-            "duration_minutes": 60
-        })
+        service = get_calendar_service()
+        calendar_task = prepare_calendar_task(task_data, schedule_index if AUTO_RESCHEDULE else None)
+        event_status = add_task_to_calendar(service, calendar_task)
         task_data["event_status"] = event_status
-        print(f"Event '{task}' created at {start_time}")
+        print(f"Event '{task}' created at {calendar_task['start_time']}")
     except Exception as e:
         print("Error adding event to Google Calendar:", e)
+
+    # Step 7: store the result so reads never re-run inference
+    persist_task(task_data, calendar_task, started_at or time.perf_counter())
     return task_data
 
 
@@ -428,37 +666,20 @@ def process_task(user_input: str):
 
 @app.delete("/delete_task/{task_id}")
 def delete_task(task_id: int):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    c.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
-
-    c.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-    conn.commit()
-    conn.close()
-    
+    if not task_db.delete_task(task_id):
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
     return {"status": "success", "message": f"Task {task_id} deleted"}
 
 @app.put("/update_task/{task_id}")
 def update_task(task_id: int, data: dict):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # Dynamically update columns based on keys in 'data'
-    updates = []
-    values = []
-    for key, value in data.items():
-        updates.append(f"{key} = ?")
-        values.append(value)
-    
-    if updates:
-        values.append(task_id)
-        c.execute(f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?", values)
-        conn.commit()
-    
-    conn.close()
+    # only known columns can be updated
+    try:
+        updated = task_db.update_task(task_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not updated:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    if "deadline" in data or "deadline_ts" in data:
+        reprioritizer.track([task_id])
     return {"status": "success", "message": f"Task {task_id} updated"}
 
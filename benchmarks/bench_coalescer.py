@@ -0,0 +1,72 @@
+#benchmark for the request coalescer: concurrent single-command clients with and without shared model calls
+#run from the repo root: python -m benchmarks.bench_coalescer [--clients 1 8 32] [--commands 2000]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import statistics
+import threading
+import time
+from coalescer import RequestCoalescer
+from inference_cache import run_models
+from benchmarks.corpus import make_corpus
+
+
+def direct(command):
+    (result,), seconds = run_models([command])
+    return result, seconds
+
+
+def run_clients(classify, commands, clients):
+    """clients threads, each sending its share of commands one at a time. Returns (commands/s, latencies)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(share):
+        mine = []
+        for command in share:
+            start = time.perf_counter()
+            classify(command)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(commands[i::clients],)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(commands) / (time.perf_counter() - start), sorted(latencies)
+
+
+def describe(throughput, latencies):
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    return f"{throughput:>7,.0f} commands/s, p50 {statistics.median(latencies) * 1000:6.2f} ms, p95 {p95 * 1000:6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--commands", type=int, default=2000)
+    args = parser.parse_args()
+
+    commands = make_corpus(args.commands)
+    run_models(commands[:10])   # load the models outside the timings
+
+    for clients in args.clients:
+        coalescer = RequestCoalescer(run_models)
+        expected = [direct(command)[0] for command in commands[:50]]
+        assert [coalescer.classify(command)[0] for command in commands[:50]] == expected
+
+        print(f"{clients:>3} clients")
+        print(f"    one call per command : {describe(*run_clients(direct, commands, clients))}")
+        coalescer = RequestCoalescer(run_models)
+        result = run_clients(coalescer.classify, commands, clients)
+        stats = coalescer.stats()
+        print(f"    coalesced            : {describe(*result)}, mean batch {stats['mean_batch_size']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#end-to-end benchmark: the whole pipeline on a synthetic corpus against an in-memory calendar
+#run from the repo root: python -m benchmarks.bench_e2e [--sizes 1 100 10000] [--events-per-day 8] [--compare old.json]
+#results are written as JSON (default benchmarks/results/e2e-<commit>.json) so two commits can be compared
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import app
+import google_integration
+import inference_cache
+from interval_index import IntervalIndex
+from priority_scorer import smart_reasoning_engine
+from schedule_cache import schedule_cache
+from stage_metrics import stage_metrics
+from task_db import TaskDB
+from temporal_parser import parse_datetime, clear_cache
+from benchmarks.corpus import make_corpus
+from benchmarks.fake_calendar import FakeCalendarService
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+GET_TASKS_PAGES = 50
+WARMUP_COMMANDS = 20
+REGRESSION_THRESHOLD = 1.10   # --compare reports timings more than 10% slower
+
+
+def summarize(seconds):
+    """Latency percentiles (ms) and throughput of a list of per-call durations."""
+    ordered = sorted(seconds)
+    total = sum(ordered)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 4)
+
+    return {
+        "calls": len(ordered),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "per_second": round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def timed_calls(func, items):
+    durations = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+@contextlib.contextmanager
+def fresh_state(tmp, name, args):
+    """Empty task DB, empty caches and a new fake calendar, so every run starts cold."""
+    calendar = FakeCalendarService(events_per_day=args.events_per_day, latency_ms=args.calendar_latency_ms)
+    google_integration.use_calendar_service(calendar)
+    schedule_cache.reset()
+    inference_cache.inference_cache.clear()
+    clear_cache()
+    stage_metrics.reset()
+    app.task_db = TaskDB(os.path.join(tmp, f"{name}.db"))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield calendar
+
+
+def run_size(commands, tmp, args):
+    results = {"commands": len(commands)}
+
+    # 1. blocking pipeline, one command at a time (what the Streamlit frontends call)
+    with fresh_state(tmp, f"single{len(commands)}", args) as calendar:
+        start = time.perf_counter()
+        processed = []
+        durations = timed_calls(lambda command: processed.append(app.process_task(command)), commands)
+        wall = time.perf_counter() - start
+    results["process_task"] = dict(summarize(durations), wall_seconds=round(wall, 3), calendar_calls=calendar.calls)
+    results["stages"] = stage_metrics.snapshot()
+
+    # 2. batch endpoint: one model pass, batched calendar inserts, one bulk insert
+    with fresh_state(tmp, f"batch{len(commands)}", args) as calendar:
+        start = time.perf_counter()
+        app.process_tasks_batch(app.BatchCommands(commands=commands))
+        wall = time.perf_counter() - start
+    results["process_tasks_batch"] = {
+        "wall_seconds": round(wall, 3),
+        "per_second": round(len(commands) / wall, 1),
+        "calendar_calls": calendar.calls,
+        "stages": stage_metrics.snapshot(),
+    }
+
+    # 3. scoring and conflict checks on the extracted entities, against the fake calendar's events
+    now = datetime.now()
+    index = IntervalIndex(schedule_cache.events.values())
+    entities = [{"task": task["task"], "priority": task["priority"], "deadline": task["deadline"]} for task in processed]
+    results["smart_reasoning_engine"] = summarize(
+        timed_calls(lambda item: smart_reasoning_engine("Add Task", item, index, now=now), entities)
+    )
+    starts = [parse_datetime(item["deadline"], reference=now) or now + timedelta(hours=1) for item in entities]
+    results["is_conflicting"] = summarize(
+        timed_calls(lambda begin: app.is_conflicting(begin, begin + timedelta(minutes=60), index), starts)
+    )
+
+    # 4. reads: first pages of the task list in every sort order, from the DB the single run filled
+    app.task_db = TaskDB(os.path.join(tmp, f"single{len(commands)}.db"))
+    request = SimpleNamespace(headers={})
+    pages = [sort for sort in ("id", "priority_score", "deadline") for _ in range(GET_TASKS_PAGES)]
+    results["get_tasks"] = summarize(timed_calls(lambda sort: app.get_tasks(request, limit=100, sort=sort), pages))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def flatten(results, prefix=""):
+    """{"process_task": {...}, "stages": {"ner": {...}}} -> {"process_task": {...}, "stages.ner": {...}}"""
+    flat = {}
+    for name, metrics in results.items():
+        if not isinstance(metrics, dict):
+            continue
+        flat[prefix + name] = metrics
+        for key, value in metrics.items():
+            if isinstance(value, dict):
+                flat.update(flatten({key: value}, prefix=f"{prefix}{name}."))
+    return flat
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Prints every timing that got more than `threshold` times slower between two result files."""
+    print(f"\ncompared with {old['commit']}:")
+    regressions = 0
+    for size, results in new["results"].items():
+        if size not in old["results"]:
+            continue
+        before = flatten(old["results"][size])
+        for name, metrics in flatten(results).items():
+            for key in ("p50_ms", "p95_ms", "wall_seconds"):
+                if metrics.get(key) and before.get(name, {}).get(key):
+                    ratio = metrics[key] / before[name][key]
+                    if ratio > threshold:
+                        regressions += 1
+                        print(f"  ⚠ {size:>6} {name:<36} {key:<12} {before[name][key]} -> {metrics[key]} ({ratio:.2f}x)")
+    if not regressions:
+        print(f"  ✅ nothing more than {threshold:.2f}x slower")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--events-per-day", type=float, default=8, help="density of the fake calendar")
+    parser.add_argument("--calendar-latency-ms", type=float, default=0, help="simulated latency per Calendar API call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result file, default benchmarks/results/e2e-<commit>.json")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="slowdown ratio reported by --compare")
+    args = parser.parse_args()
+
+    inference_cache.inference_cache.disk_path = None
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": vars(args),
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # load the models and dateparser's language data outside the timings
+        with fresh_state(tmp, "warmup", args):
+            for command in make_corpus(WARMUP_COMMANDS, seed=args.seed + 1):
+                app.process_task(command)
+
+        for size in args.sizes:
+            results = run_size(make_corpus(size, seed=args.seed), tmp, args)
+            report["results"][str(size)] = results
+            single, batch = results["process_task"], results["process_tasks_batch"]
+            print(f"{size:>6} commands: process_task p50 {single['p50_ms']} ms, p95 {single['p95_ms']} ms, "
+                  f"{single['per_second']}/s | batch {batch['per_second']}/s | "
+                  f"reasoning p50 {results['smart_reasoning_engine']['p50_ms']} ms | "
+                  f"get_tasks p50 {results['get_tasks']['p50_ms']} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"saved {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#benchmark for the packed NER model: load time and memory of models/entity_clf vs models/entity_clf_packed
+#run from the repo root: python -m benchmarks.bench_entity_model [--runs 5]
+#every run is a fresh interpreter; "anonymous" is memory each extra worker process adds, mapped weight pages are shared
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from entity_model import PACKED_ENTITY_PATH, NOTEBOOK_TEST_TEXTS
+from model_registry import ENTITY_MODEL_PATH
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time, spacy
+import entity_model
+
+def memory():
+    fields = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields
+
+before = memory()
+start = time.perf_counter()
+nlp = entity_model.load_packed_entity_model({path!r}) if {packed!r} else spacy.load({path!r})
+load_seconds = time.perf_counter() - start
+entities = [[(ent.text, ent.label_) for ent in doc.ents] for doc in nlp.pipe({texts!r})]
+after = memory()
+print(json.dumps({{
+    "load_seconds": load_seconds,
+    "rss": after["Rss"] - before["Rss"],
+    "anonymous": after["Anonymous"] - before["Anonymous"],
+    "entities": entities,
+}}))
+"""
+
+
+def run_child(path, packed):
+    code = CHILD.format(path=path, packed=packed, texts=NOTEBOOK_TEST_TEXTS)
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1] if output.stderr else "child failed")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def disk_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per model (median is reported)")
+    args = parser.parse_args()
+    if not os.path.exists(PACKED_ENTITY_PATH):
+        sys.exit(f"{PACKED_ENTITY_PATH} is missing, run: python entity_model.py")
+
+    entities = {}
+    for name, path, packed in (("original", ENTITY_MODEL_PATH, False), ("packed", PACKED_ENTITY_PATH, True)):
+        results = [run_child(path, packed) for _ in range(args.runs)]
+        entities[name] = results[0]["entities"]
+        print(f"{name} ({path}, {disk_size(path) / 1e6:.1f} MB on disk):")
+        print(f"  load       : {statistics.median(r['load_seconds'] for r in results) * 1000:>8.1f} ms")
+        print(f"  RSS added  : {statistics.median(r['rss'] for r in results) / 1e6:>8.1f} MB")
+        print(f"  anonymous  : {statistics.median(r['anonymous'] for r in results) / 1e6:>8.1f} MB (not shared between workers)")
+
+    same = entities["original"] == entities["packed"]
+    print(f"{'✅' if same else '❌'} entities on the notebook test sentences {'match' if same else 'differ'}")
+
+
+if __name__ == "__main__":
+    main()
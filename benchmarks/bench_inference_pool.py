@@ -0,0 +1,47 @@
+#benchmark for the inference worker pool: throughput of intent + NER in-process vs 1..N worker processes
+#run from the repo root: python -m benchmarks.bench_inference_pool [--commands 5000] [--workers 1 2 4]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import os
+import time
+import inference_cache
+from inference_pool import InferencePool
+from benchmarks.corpus import make_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    commands = make_corpus(args.commands)
+    inference_cache.run_models(commands[:10])   # load the models outside the timing
+
+    start = time.perf_counter()
+    expected, _ = inference_cache.run_models(commands)
+    baseline = len(commands) / (time.perf_counter() - start)
+    print(f"cores        : {os.cpu_count()}")
+    print(f"in-process   : {baseline:>8,.0f} commands/s")
+
+    for workers in args.workers:
+        pool = InferencePool(workers=workers, max_batch=args.max_batch).start()
+        try:
+            pool.classify_many(commands[:workers * args.max_batch])   # first batches in every worker
+            start = time.perf_counter()
+            results = pool.classify_many(commands)
+            throughput = len(commands) / (time.perf_counter() - start)
+            stats = pool.stats()
+        finally:
+            pool.stop()
+        assert results == expected, "pool results differ from in-process inference"
+        print(f"{workers} worker(s)  : {throughput:>8,.0f} commands/s ({throughput / baseline:.2f}x in-process, "
+              f"mean batch {stats['mean_batch_size']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#benchmark for the compiled intent classifier against the sklearn pickle
+#run from the repo root: python -m benchmarks.bench_intent_engine [--batch 10000]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import random
+import statistics
+import time
+import joblib
+from intent_engine import CompiledIntentClassifier, NOTEBOOK_TEST_TEXTS, NOTEBOOK_TEST_LABELS
+from model_registry import INTENT_MODEL_PATH
+from benchmarks.bench_save_many import TASKS, DEADLINES
+
+VERBS = ["Add", "Remind me to", "Delete", "Set deadline for", "Mark", "Change", "Please add", "Remove"]
+
+
+def make_commands(n, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(VERBS)} {rng.choice(TASKS)} {rng.choice(DEADLINES) or ''}".strip() for _ in range(n)]
+
+
+def per_command_ms(model, commands):
+    timings = []
+    for command in commands:
+        start = time.perf_counter()
+        model.predict([command])
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def batch_throughput(model, commands):
+    start = time.perf_counter()
+    model.predict(commands)
+    return len(commands) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--single", type=int, default=2000, help="single-command predict calls to time")
+    parser.add_argument("--batch", type=int, default=10000, help="commands in the batch predict call")
+    args = parser.parse_args()
+
+    pipeline = joblib.load(INTENT_MODEL_PATH)
+    compiled = CompiledIntentClassifier.from_pipeline(pipeline)
+
+    # same labels as the pickle, on the notebook test set and on the synthetic commands
+    commands = make_commands(args.batch)
+    for texts in (NOTEBOOK_TEST_TEXTS, commands):
+        expected = [str(label) for label in pipeline.predict(texts)]
+        got = [str(label) for label in compiled.predict(texts)]
+        assert expected == got, [t for t, a, b in zip(texts, expected, got) if a != b][:5]
+    accuracy = sum(str(a) == b for a, b in zip(compiled.predict(NOTEBOOK_TEST_TEXTS), NOTEBOOK_TEST_LABELS))
+    print(f"labels     : identical on {len(NOTEBOOK_TEST_TEXTS)} notebook test texts and {len(commands)} commands "
+          f"(test accuracy {accuracy}/{len(NOTEBOOK_TEST_LABELS)})")
+
+    singles = commands[:args.single]
+    pickle_ms, compiled_ms = per_command_ms(pipeline, singles), per_command_ms(compiled, singles)
+    print(f"per command: pickle {pickle_ms:.3f} ms, compiled {compiled_ms:.3f} ms ({pickle_ms / compiled_ms:.1f}x)")
+
+    pickle_rate, compiled_rate = batch_throughput(pipeline, commands), batch_throughput(compiled, commands)
+    print(f"batch      : pickle {pickle_rate:,.0f} cmd/s, compiled {compiled_rate:,.0f} cmd/s "
+          f"({compiled_rate / pickle_rate:.1f}x, {len(commands)} commands)")
+
+
+if __name__ == "__main__":
+    main()
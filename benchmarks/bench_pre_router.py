@@ -0,0 +1,92 @@
+#benchmark for the rule-based pre-router: how many commands it answers, how often it agrees with the models,
+#and how much faster it is than running them
+#run from the repo root: python -m benchmarks.bench_pre_router [--show 5]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import ast
+import json
+import time
+from pre_router import RULES, evaluate, match
+from inference_cache import run_models
+from benchmarks.bench_intent_engine import make_commands
+
+NOTEBOOK_PATH = "models.ipynb"
+
+
+def notebook_texts(path=NOTEBOOK_PATH):
+    """Every training / test sentence in models.ipynb (intent texts and NER examples)."""
+    with open(path, encoding="utf-8") as f:
+        cells = [''.join(cell["source"]) for cell in json.load(f)["cells"] if cell["cell_type"] == "code"]
+
+    texts = []
+    for source in cells:
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign):
+                targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
+            elif isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+                targets = [node.target.id]
+            else:
+                continue
+            if {"train_texts", "test_texts"} & set(targets):
+                texts += ast.literal_eval(node.value)
+            elif "TRAIN_DATA" in targets:
+                texts += [text for text, _ in ast.literal_eval(node.value)]
+    # keep the first occurrence of each sentence
+    return list(dict.fromkeys(texts))
+
+
+def models_only(commands):
+    return run_models(commands)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--synthetic", type=int, default=0, help="synthetic commands added to the notebook texts")
+    parser.add_argument("--show", type=int, default=3, help="disagreements to print per rule")
+    args = parser.parse_args()
+
+    commands = notebook_texts() + make_commands(args.synthetic)
+    models_only(commands[:1])   # load both models outside the timings
+
+    report = evaluate(commands, models_only)
+    print(f"commands       : {report['commands']}")
+    print(f"routed         : {report['routed']} ({report['routed'] / report['commands']:.1%})")
+    if report["routed"]:
+        print(f"intent agree   : {report['intent_agreement']:.1%}")
+        print(f"entity agree   : {report['entity_agreement']:.1%}")
+    for name, _, _ in RULES:
+        rule = report["rules"][name]
+        if not rule["routed"]:
+            print(f"  {name:<18} routed 0")
+            continue
+        print(f"  {name:<18} routed {rule['routed']:>5}, intent {rule['intent_agree'] / rule['routed']:.1%}, "
+              f"entities {rule['entities_agree'] / rule['routed']:.1%}")
+        for item in rule["disagreements"][:args.show]:
+            print(f"      {item['command']!r}")
+            print(f"        rules : {item['rules']['intent']} {item['rules']['entities']}")
+            print(f"        models: {item['models']['intent']} {item['models']['entities']}")
+
+    # latency on the commands the rules answer: regexes vs the intent model + spaCy, one command at a time
+    routed = [command for command in commands if match(command)]
+    if not routed:
+        return
+    start = time.perf_counter()
+    for command in routed:
+        match(command)
+    rules_ms = (time.perf_counter() - start) / len(routed) * 1000
+    start = time.perf_counter()
+    for command in routed:
+        run_models([command])
+    models_ms = (time.perf_counter() - start) / len(routed) * 1000
+    print(f"per command    : rules {rules_ms:.4f} ms, models {models_ms:.3f} ms ({models_ms / rules_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#benchmark for the batch priority scorer: same scores as smart_reasoning_engine, one NumPy pass for the backlog
+#run from the repo root: python -m benchmarks.bench_priority_scorer [--tasks 20000]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from interval_index import IntervalIndex
+from priority_scorer import smart_reasoning_engine, score_tasks, score_columns, task_columns
+from benchmarks.bench_save_many import TASKS, DEADLINES
+
+EXTRA_TASKS = ["team meeting", "submit assignment", "prepare slides for demo", "quiz revision", "urgent call"]
+PRIORITIES = [None, "high", "low", "medium", "urgent", "HIGH"]
+
+
+def make_tasks(n, seed=0):
+    rng = random.Random(seed)
+    deadlines = DEADLINES + ["in 3 days", "today 11pm", "next month", "tomorrow 9am"]
+    return [
+        {"task": rng.choice(TASKS + EXTRA_TASKS), "priority": rng.choice(PRIORITIES), "deadline": rng.choice(deadlines)}
+        for _ in range(n)
+    ]
+
+
+def make_calendar(now, n=200, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        start = now + timedelta(minutes=rng.randrange(0, 14 * 24 * 60, 15))
+        events.append({"id": str(i), "title": f"event {i}", "start": start,
+                       "end": start + timedelta(minutes=rng.choice([30, 60, 90]))})
+    return IntervalIndex(events)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20000)
+    args = parser.parse_args()
+
+    now = datetime(2026, 3, 2, 10, 0)   # fixed minute boundary so relative deadlines are reproducible
+    tasks = make_tasks(args.tasks)
+    calendar = make_calendar(now)
+
+    start = time.perf_counter()
+    expected = [smart_reasoning_engine("Add Task", task, calendar, now=now) for task in tasks]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = task_columns(tasks, calendar, now=now)
+    columns_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    scores, final_priorities = score_columns(**columns)
+    score_seconds = time.perf_counter() - start
+
+    mismatches = [
+        i for i, result in enumerate(expected)
+        if result["score"] != scores[i] or result["final_priority"] != final_priorities[i]
+    ]
+    assert not mismatches, [(tasks[i], expected[i]["score"], int(scores[i])) for i in mismatches[:5]]
+
+    explained = score_tasks(tasks[:3], calendar, now=now, explain=[0])["reasoning"][0]
+    assert explained == smart_reasoning_engine(None, tasks[0], calendar, now=now)["reasoning"]
+
+    print(f"scores      : identical for {len(tasks)} tasks "
+          f"({sum(p == 'high' for p in final_priorities)} high, {sum(p == 'medium' for p in final_priorities)} medium)")
+    print(f"one by one  : {len(tasks) / single_seconds:>12,.0f} tasks/s (smart_reasoning_engine)")
+    print(f"columns     : {len(tasks) / columns_seconds:>12,.0f} tasks/s (parsing, keywords, conflicts)")
+    print(f"score pass  : {len(tasks) / score_seconds:>12,.0f} tasks/s (score_columns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#benchmark for the bulk-ingest path: save_many vs one save per row
+#run from the repo root: python -m benchmarks.bench_save_many [--rows 200000]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import os
+import random
+import tempfile
+import time
+from db_management import save_many, result_to_task
+from task_db import TaskDB
+
+TARGET_ROWS_PER_SECOND = 50000
+
+# shapes taken from the training sentences in models.ipynb
+TASKS = ["buy groceries", "call mom", "submit report", "water the plants", "pay bills",
+         "clean the kitchen", "email Professor John", "study for exam", "book tickets", "walk the dog"]
+DEADLINES = [None, "tomorrow", "tomorrow 5pm", "7pm", "next Friday", "Sunday night", "Monday", "tonight"]
+PRIORITIES = [None, "high", "low", "medium", "urgent"]
+INTENTS = ["Add Task", "Set Priority", "Set Deadline", "Delete Task", "Edit Task"]
+
+
+def make_results(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        entities = {"TASK": rng.choice(TASKS)}
+        deadline = rng.choice(DEADLINES)
+        priority = rng.choice(PRIORITIES)
+        if deadline:
+            entities["DEADLINE"] = deadline
+        if priority:
+            entities["PRIORITY"] = priority
+        yield {"command": f"command {i}", "intent": rng.choice(INTENTS), "entities": entities}
+
+
+def bench_save_many(rows, chunk_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TaskDB(os.path.join(tmp, "bench.db"))
+        db.connection()
+        results = list(make_results(rows))
+        start = time.perf_counter()
+        report = save_many(results, chunk_size=chunk_size, db=db)
+        elapsed = time.perf_counter() - start
+        db.close()
+    assert not report["failures"], report["failures"][:5]
+    return rows / elapsed
+
+
+def bench_row_by_row(rows):
+    # what save_to_db does: one insert and one commit per result
+    with tempfile.TemporaryDirectory() as tmp:
+        db = TaskDB(os.path.join(tmp, "bench.db"))
+        db.connection()
+        results = list(make_results(rows))
+        start = time.perf_counter()
+        for result in results:
+            db.insert_task(result_to_task(result))
+        elapsed = time.perf_counter() - start
+        db.close()
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--baseline-rows", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    baseline = bench_row_by_row(args.baseline_rows)
+    bulk = bench_save_many(args.rows, args.chunk_size)
+
+    print(f"row by row : {baseline:>10,.0f} rows/s ({args.baseline_rows} rows)")
+    print(f"save_many  : {bulk:>10,.0f} rows/s ({args.rows} rows, chunks of {args.chunk_size})")
+    print(f"target     : {TARGET_ROWS_PER_SECOND:>10,} rows/s -> {'PASS' if bulk >= TARGET_ROWS_PER_SECOND else 'FAIL'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#benchmark for the stage timing overhead: cost of one `with timed(...)` block, with and without a per-request collector
+#run from the repo root: python -m benchmarks.bench_stage_metrics [--iterations 200000]
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import time
+from stage_metrics import StageMetrics, stage_metrics, timed, start_request_timings, stop_request_timings
+
+
+def per_call_us(iterations, body):
+    start = time.perf_counter()
+    body(iterations)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def empty_loop(iterations):
+    for _ in range(iterations):
+        pass
+
+
+def timed_loop(iterations):
+    for _ in range(iterations):
+        with timed("bench"):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = per_call_us(args.iterations, empty_loop)
+    plain = per_call_us(args.iterations, timed_loop) - baseline
+    timings, token = start_request_timings()
+    try:
+        collected = per_call_us(args.iterations, timed_loop) - baseline
+    finally:
+        stop_request_timings(token)
+
+    stats = stage_metrics.snapshot()["bench"]
+    assert stats["count"] == 2 * args.iterations and "bench" in timings
+    metrics = StageMetrics()
+    metrics.observe("check", 0.003)
+    assert 0.0025 <= metrics.snapshot()["check"]["p50_ms"] / 1000 <= 0.005
+
+    print(f"timed stage          : {plain:.2f} µs per stage")
+    print(f"with request timings : {collected:.2f} µs per stage (X-Stage-Timings enabled)")
+    print(f"recorded             : {stats['count']} observations, p50 {stats['p50_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#benchmark for cold start: time to import app / the frontend modules and time to the first inference
+#run from the repo root: python -m benchmarks.bench_startup [--runs 5]
+#every run is a fresh interpreter, so nothing is already imported or loaded
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that should only show up once they are actually needed
+HEAVY_MODULES = ["spacy", "sklearn", "joblib", "dateparser", "googleapiclient", "google_auth_oauthlib", "streamlit"]
+
+# what a Streamlit frontend imports before its first paint
+FRONTEND_IMPORTS = "import google_integration, model_registry, schedule_cache, task_db"
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+import_seconds = time.perf_counter() - start
+result = {{"import_seconds": import_seconds,
+           "heavy_modules": [name for name in {heavy!r} if name in sys.modules]}}
+if {infer!r}:
+    import inference_cache
+    inference_cache.inference_cache.disk_path = None   # measure the models, not the disk cache
+    start = time.perf_counter()
+    inference_cache.classify("submit assignment tomorrow 5pm")
+    result["first_inference_seconds"] = time.perf_counter() - start
+    start = time.perf_counter()
+    inference_cache.classify("call mom tonight")
+    result["warm_inference_seconds"] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def run_child(imports, infer):
+    code = CHILD.format(imports=imports, heavy=HEAVY_MODULES, infer=infer)
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1] if output.stderr else "child failed")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def bench(name, imports, infer, runs):
+    results = [run_child(imports, infer) for _ in range(runs)]
+    print(f"{name}:")
+    print(f"  import           : {statistics.median(r['import_seconds'] for r in results) * 1000:>8.1f} ms")
+    if infer:
+        print(f"  first inference  : {statistics.median(r['first_inference_seconds'] for r in results) * 1000:>8.1f} ms"
+              " (includes loading both models)")
+        print(f"  warm inference   : {statistics.median(r['warm_inference_seconds'] for r in results) * 1000:>8.1f} ms")
+    print(f"  heavy modules    : {', '.join(results[0]['heavy_modules']) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement (median is reported)")
+    parser.add_argument("--skip-inference", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+
+    bench("frontend modules", FRONTEND_IMPORTS, False, args.runs)
+    bench("app", "import app", not args.skip_inference, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#synthetic command corpus built from the NER training sentences in models.ipynb
+#every sentence is used as a template: its TASK / DEADLINE / PRIORITY / ... spans are swapped for values
+#of the same label taken from other sentences, so the commands keep the shapes the models were trained on
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import ast
+import json
+import random
+
+NOTEBOOK_PATH = "models.ipynb"
+
+# the notebook only has ~10 deadlines; more variety keeps the date parser cache from answering everything
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+EXTRA_DEADLINES = [
+    f"{day} {hour}{half}" for day in WEEKDAYS + ["next " + day for day in WEEKDAYS] + ["tomorrow"]
+    for hour in (9, 11, 3, 5) for half in ("am", "pm")
+]
+
+
+def notebook_examples(path=NOTEBOOK_PATH):
+    """(text, [(start, end, label), ...]) for every TRAIN_DATA sentence in models.ipynb."""
+    with open(path, encoding="utf-8") as f:
+        cells = [''.join(cell["source"]) for cell in json.load(f)["cells"] if cell["cell_type"] == "code"]
+
+    examples = []
+    for source in cells:
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "TRAIN_DATA" for t in node.targets):
+                examples += [(text, sorted(spec["entities"])) for text, spec in ast.literal_eval(node.value)]
+    # a few notebook examples have offsets that cut words in half, they would make broken templates
+    return [(text, spans) for text, spans in examples if all(_on_word_boundaries(text, s, e) for s, e, _ in spans)]
+
+
+def _on_word_boundaries(text, start, end):
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def entity_values(examples):
+    """{label: [distinct span texts]} over all examples."""
+    values = {}
+    for text, spans in examples:
+        for start, end, label in spans:
+            values.setdefault(label, {})[text[start:end]] = None
+    return {label: list(texts) for label, texts in values.items()}
+
+
+def fill_template(text, spans, values, rng):
+    """text with each span replaced by a random value of the same label."""
+    parts = []
+    position = 0
+    for start, end, label in spans:
+        if start < position:
+            continue   # overlapping spans, keep the first one
+        parts.append(text[position:start])
+        parts.append(rng.choice(values[label]))
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def make_corpus(n, seed=0, path=NOTEBOOK_PATH):
+    """n synthetic commands, reproducible for a given seed."""
+    examples = notebook_examples(path)
+    values = entity_values(examples)
+    values["DEADLINE"] = values.get("DEADLINE", []) + EXTRA_DEADLINES
+    rng = random.Random(seed)
+    return [fill_template(*rng.choice(examples), values, rng) for _ in range(n)]
+
+
+if __name__ == "__main__":
+    for command in make_corpus(10):
+        print(command)
@@ -0,0 +1,107 @@
+#in-memory stand-in for the Google Calendar service, for benchmarks that shouldn't touch the real API
+#supports what google_integration and schedule_cache call: events().list / insert and batch requests
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+PAGE_SIZE = 250
+
+
+class _Request:
+    def __init__(self, calendar, method, kwargs):
+        self.calendar = calendar
+        self.method = method
+        self.kwargs = kwargs
+
+    def execute(self, http=None):
+        self.calendar._wait()
+        return getattr(self.calendar, self.method)(**self.kwargs)
+
+
+class _Events:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def list(self, **kwargs):
+        return _Request(self.calendar, "_list", kwargs)
+
+    def insert(self, calendarId, body):
+        return _Request(self.calendar, "_insert", {"body": body})
+
+
+class _Batch:
+    def __init__(self, calendar, callback):
+        self.calendar = calendar
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        # one round trip for the whole batch, like the real batch endpoint
+        self.calendar._wait()
+        for request_id, request in self.requests:
+            self.callback(request_id, getattr(self.calendar, request.method)(**request.kwargs), None)
+
+
+class FakeCalendarService:
+    """
+    A calendar holding events_per_day random 30-90 minute events for the next `days` days.
+    latency_ms is slept once per API round trip (a list page, an insert or a whole batch).
+    """
+
+    def __init__(self, events_per_day=8, days=14, latency_ms=0, seed=0, now=None):
+        self.latency = latency_ms / 1000
+        self.items = []
+        self.calls = 0
+        now = (now or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+        rng = random.Random(seed)
+        for _ in range(int(events_per_day * days)):
+            start = now + timedelta(minutes=rng.randrange(0, days * 24 * 60, 15))
+            self._add(f"event {len(self.items)}", start, start + timedelta(minutes=rng.choice([30, 60, 90])))
+
+    def _add(self, summary, start, end):
+        event = {
+            "id": f"fake{len(self.items)}",
+            "summary": summary,
+            "status": "confirmed",
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": end.isoformat()},
+            "htmlLink": f"https://calendar.example/event/{len(self.items)}",
+        }
+        self.items.append(event)
+        return event
+
+    def _wait(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # same surface as googleapiclient's Calendar service
+    def events(self):
+        return _Events(self)
+
+    def new_batch_http_request(self, callback):
+        return _Batch(self, callback)
+
+    def _list(self, **kwargs):
+        # events are never edited or deleted here, so a sync token is just "how many events you have seen"
+        first = int(kwargs.get("syncToken") or 0)
+        start = first + int(kwargs.get("pageToken") or 0)
+        size = kwargs.get("maxResults") or PAGE_SIZE
+        result = {"items": self.items[start:start + size]}
+        if start + size < len(self.items):
+            result["nextPageToken"] = str(start + size - first)
+        else:
+            result["nextSyncToken"] = str(len(self.items))
+        return result
+
+    def _insert(self, body):
+        start = datetime.fromisoformat(body["start"]["dateTime"])
+        end = datetime.fromisoformat(body["end"]["dateTime"])
+        return self._add(body.get("summary", ""), start, end)
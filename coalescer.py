@@ -0,0 +1,165 @@
+#this file coalesces concurrent single-command requests into one model call
+#commands that arrive together share one intent predict / nlp.pipe call; a lone request is run right away
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from stage_metrics import stage_metrics
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+ENABLED = True
+MAX_BATCH = 32          # commands per model call
+MIN_WINDOW_MS = 2       # under load a batch stays open between these two
+MAX_WINDOW_MS = 5
+SMOOTHING = 0.2         # weight of the newest sample in the arrival gap / concurrency moving averages
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+#---------------------------------------------------------
+# coalescer
+#---------------------------------------------------------
+class RequestCoalescer:
+    """
+    run_batch(commands) -> (results, seconds) is called from one dispatcher thread.
+    Whatever queued while the previous batch ran is taken without waiting. Then the batch stays open
+    until it holds as many commands as are usually in flight together, for at most MIN_WINDOW_MS + the
+    average arrival gap (capped at MAX_WINDOW_MS). A lone client, or requests further apart than
+    MAX_WINDOW_MS, don't wait at all.
+    """
+
+    def __init__(self, run_batch, max_batch=MAX_BATCH, min_window_ms=MIN_WINDOW_MS, max_window_ms=MAX_WINDOW_MS):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.min_window = min_window_ms / 1000
+        self.max_window = max_window_ms / 1000
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.gap = None             # moving average of the time between arrivals, seconds
+        self.last_arrival = None
+        self.in_flight = 0
+        self.concurrency = 0.0      # moving average of the other requests in flight when one arrives
+        self.batch_sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.batches = 0
+        self.commands = 0
+
+    def submit(self, command):
+        """Future for (result, model seconds per command)."""
+        now = time.monotonic()
+        with self.lock:
+            if self.last_arrival is not None:
+                gap = now - self.last_arrival
+                self.gap = gap if self.gap is None else self.gap + SMOOTHING * (gap - self.gap)
+            self.last_arrival = now
+            self.concurrency += SMOOTHING * (self.in_flight - self.concurrency)
+            self.in_flight += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._dispatch, name="coalescer", daemon=True)
+                self.thread.start()
+        future = Future()
+        self.queue.put((command, future, now))
+        return future
+
+    def classify(self, command):
+        return self.submit(command).result()
+
+    def window(self):
+        """(seconds the next batch may stay open, batch size worth waiting for)."""
+        gap = self.gap
+        target = min(self.max_batch, round(self.concurrency) + 1)
+        if gap is None or gap >= self.max_window or target <= 1:
+            return 0.0, 1
+        return min(self.max_window, self.min_window + gap), target
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        # queued while the last batch was running: no reason to wait for these
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        window, target = self.window()
+        flush_at = time.monotonic() + window
+        while len(batch) < target:
+            timeout = flush_at - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self):
+        while True:
+            self._run(self._collect())
+
+    def _run(self, batch):
+        started = time.monotonic()
+        for _, _, arrived in batch:
+            stage_metrics.observe("coalescer_wait", started - arrived)
+        self._record_size(len(batch))
+
+        try:
+            results, seconds = self.run_batch([command for command, _, _ in batch])
+        except Exception as e:
+            self._done(len(batch))
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        self._done(len(batch))
+        per_command = seconds / len(batch)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result((result, per_command))
+
+    def _done(self, count):
+        with self.lock:
+            self.in_flight -= count
+
+    def _record_size(self, size):
+        position = 0
+        while position < len(BATCH_SIZE_BUCKETS) and size > BATCH_SIZE_BUCKETS[position]:
+            position += 1
+        with self.lock:
+            self.batch_sizes[position] += 1
+            self.batches += 1
+            self.commands += size
+
+    def stats(self):
+        waits = stage_metrics.snapshot().get("coalescer_wait", {})
+        with self.lock:
+            sizes = {str(bound): count for bound, count in zip(BATCH_SIZE_BUCKETS, self.batch_sizes)}
+            sizes["+Inf"] = self.batch_sizes[-1]
+            return {
+                "enabled": ENABLED,
+                "batches": self.batches,
+                "commands": self.commands,
+                "mean_batch_size": round(self.commands / self.batches, 2) if self.batches else None,
+                "batch_size_histogram": sizes,
+                "window_ms": round(self.window()[0] * 1000, 3),
+                "concurrency": round(self.concurrency, 2),
+                "queue_wait_ms": {key: waits.get(key) for key in ("p50_ms", "p95_ms", "p99_ms")},
+            }
+
+    def prometheus(self):
+        """Batch size histogram in Prometheus text format (queue wait is the coalescer_wait stage in stage_metrics)."""
+        name = "coalescer_batch_size"
+        with self.lock:
+            counts, batches, commands = list(self.batch_sizes), self.batches, self.commands
+        lines = [f"# HELP {name} Commands per coalesced model call.", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(BATCH_SIZE_BUCKETS, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {batches}')
+        lines.append(f"{name}_sum {commands}")
+        lines.append(f"{name}_count {batches}")
+        return "\n".join(lines) + "\n"
@@ -1,10 +1,11 @@
-import joblib
-import spacy
-import sqlite3
+import argparse
+import json
+import sys
+import time
+from task_db import TaskDB, task_db
+from inference_cache import classify, classify_many
 # This code contains functions that process user commands, turn them into structures objects and save them to the db
-# Load models
-intent_clf = joblib.load("models/intent_classifier.pkl")
-nlp = spacy.load("models/entity_clf")
+# Models are shared with app.py through model_registry, repeated commands are answered by inference_cache
 
 def process_user_command(command: str):
     """
@@ -12,49 +13,118 @@ def process_user_command(command: str):
     Returns a structured dictionary.
     """
     
-    # Predict intent
-    intent = intent_clf.predict([command])[0]
-    
-    # Extract entities using spaCy
-    doc = nlp(command)
-    entities = {ent.label_: ent.text for ent in doc.ents}
+    # Predict intent and extract entities (cached for repeated commands)
+    classified = classify(command)
     
     # Combine into a structured object
     result = {
         "command": command,
-        "intent": intent,
-        "entities": entities
+        "intent": classified["intent"],
+        "entities": classified["entities"]
     }
     return result
 
 
+def process_user_commands(commands, batch_size=256):
+    """
+    Same as process_user_command for many commands: one predict call and one nlp.pipe pass per batch.
+    Yields results in order.
+    """
+    batch = []
+    for command in commands:
+        batch.append(command)
+        if len(batch) >= batch_size:
+            yield from _process_batch(batch)
+            batch = []
+    if batch:
+        yield from _process_batch(batch)
+
 
+def _process_batch(commands):
+    for command, classified in zip(commands, classify_many(commands)):
+        yield {
+            "command": command,
+            "intent": classified["intent"],
+            "entities": classified["entities"]
+        }
 
 
-def save_to_db(result):
-    conn = sqlite3.connect("tasks.db")
-    c = conn.cursor()
-    
+def result_to_task(result):
+    """Maps a process_user_command result onto the tasks table columns."""
     entities = result["entities"]
 
     # Ensure missing keys are saved as None
-    task = entities.get("TASK")
-    deadline = entities.get("DEADLINE")
-    priority = entities.get("PRIORITY")
-    location = entities.get("LOCATION")
-    recurrence = entities.get("RECURRENCE")
-    duration = entities.get("DURATION")
-    intent = result["intent"]
+    return {
+        "task": entities.get("TASK"),
+        "deadline": entities.get("DEADLINE"),
+        "priority": entities.get("PRIORITY"),
+        "location": entities.get("LOCATION"),
+        "recurrence": entities.get("RECURRENCE"),
+        "duration": entities.get("DURATION"),
+        "intent": result["intent"]
+    }
+
 
+def save_to_db(result):
     try:
-        c.execute("""
-            INSERT INTO tasks (task, deadline, priority, location, recurrence, duration, intent)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (task, deadline, priority, location, recurrence, duration, intent))
-        
-        conn.commit()
+        task_id = task_db.insert_task(result_to_task(result))
         print("✅ Task saved to database!")
+        return task_id
     except Exception as e:
         print("❌ Database error:", e)
-    finally:
-        conn.close()
\ No newline at end of file
+
+
+def _to_task(item):
+    # JSON lines straight from a file are decoded here so a bad line only fails its own row
+    return result_to_task(json.loads(item) if isinstance(item, str) else item)
+
+
+def save_many(results, chunk_size=5000, db=None):
+    """
+    Bulk version of save_to_db for an iterable of process_user_command results (dicts or JSON strings).
+    Rows are written with executemany in chunked transactions; a bad row is reported, not fatal.
+    Returns {"ids": [...], "failures": [{"index": i, "error": message}, ...]},
+    where ids[i] is None for every failed row.
+    """
+    db = db or task_db
+    ids, failures = db.insert_tasks(results, chunk_size=chunk_size, transform=_to_task)
+    saved = len(ids) - len(failures)
+    print(f"✅ Saved {saved} tasks to database" + (f", ❌ {len(failures)} failed" if failures else ""))
+    return {"ids": ids, "failures": [{"index": i, "error": error} for i, error in failures]}
+
+
+#---------------------------------------------------------
+# command line: bulk import
+#---------------------------------------------------------
+def _read_input(path):
+    if path == "-":
+        yield from sys.stdin
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import tasks into the tasks database.")
+    parser.add_argument("path", help="file to import, or - for stdin")
+    parser.add_argument("--commands", action="store_true",
+                        help="the file has one plain-text command per line (classified before saving) "
+                             "instead of one JSON process_user_command result per line")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--db", default=task_db.path, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    lines = (line.strip() for line in _read_input(args.path))
+    lines = (line for line in lines if line)
+    results = process_user_commands(lines) if args.commands else lines
+
+    start = time.perf_counter()
+    report = save_many(results, chunk_size=args.chunk_size, db=TaskDB(args.db))
+    elapsed = time.perf_counter() - start
+    print(f"Imported {len(report['ids'])} rows in {elapsed:.2f}s")
+    for failure in report["failures"]:
+        print(f"  row {failure['index']}: {failure['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#this file repackages the spaCy NER model so it loads faster and worker processes share its weights
+#the NER weights go into one flat file that is memory-mapped on load; the empty vocab (strings, lookups, vectors) is dropped
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import json
+import os
+import shutil
+import numpy as np
+from model_registry import ENTITY_MODEL_PATH, artifact_hash
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+PACKED_ENTITY_PATH = "models/entity_clf_packed"
+WEIGHTS_FILE = "weights.bin"      # every parameter of every pipe, little-endian, one after another
+INDEX_FILE = "weights.json"       # pipe, node, param name, shape and offset of each one
+ALIGNMENT = 64                    # byte alignment of each parameter in the weights file
+
+# test sentences from models.ipynb, used to check a packed model before it is saved
+NOTEBOOK_TEST_TEXTS = [
+    "Remind me to call Ali tomorrow at 5pm",
+    "Schedule a meeting at Starbucks every Monday at 10am",
+    "Submit assignment by next Friday evening",
+    "Go for a 30 minute walk daily",
+    "Set priority to low and submit report by next Monday",
+]
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def _entities(nlp, texts):
+    return [[(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents] for doc in nlp.pipe(texts)]
+
+
+def _weighted_pipes(nlp):
+    """(name, thinc model) of every pipe that has one."""
+    return [(name, pipe.model) for name, pipe in nlp.pipeline if hasattr(pipe, "model")]
+
+
+def _pack_weights(nlp, dtype):
+    """
+    Takes every parameter out of the pipes' models. Returns (index, arrays): the models keep their
+    structure with empty params, so config + skeleton + weights file rebuild the same pipeline.
+    """
+    index = []
+    arrays = []
+    offset = 0
+    itemsize = np.dtype(dtype).itemsize
+    for pipe_name, model in _weighted_pipes(nlp):
+        for node_id, node in enumerate(model.walk()):
+            for param in node.param_names:
+                if not node.has_param(param):
+                    continue
+                array = np.asarray(node.get_param(param), dtype=dtype)
+                offset += -offset % ALIGNMENT
+                index.append({
+                    "pipe": pipe_name,
+                    "node": node_id,
+                    "param": param,
+                    "shape": list(array.shape),
+                    "offset": offset,
+                })
+                arrays.append(array)
+                offset += array.size * itemsize
+    return index, arrays
+
+
+def _write_weights(path, index, arrays, dtype):
+    with open(path, "wb") as f:
+        for entry, array in zip(index, arrays):
+            f.write(b"\0" * (entry["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<")).tobytes())
+
+
+def _write_skeletons(nlp, dest):
+    """Overwrites each pipe's model file with the same model minus its params (a few KB)."""
+    import srsly
+    for pipe_name, model in _weighted_pipes(nlp):
+        msg = model.to_dict()
+        msg["params"] = [{param: None for param in params} for params in msg["params"]]
+        with open(os.path.join(dest, pipe_name, "model"), "wb") as f:
+            f.write(srsly.msgpack_dumps(msg))
+
+
+def _map_weights(nlp, path, info):
+    """
+    Points every param at a slice of the weights file. float32 files are mapped copy-on-write:
+    thinc's kernels want writeable buffers, but inference never writes, so the pages stay shared
+    with the page cache and every other process that maps the same file.
+    """
+    dtype = np.dtype(info["dtype"]).newbyteorder("<")
+    weights = np.memmap(os.path.join(path, WEIGHTS_FILE), dtype=dtype, mode="c")
+    models = dict(_weighted_pipes(nlp))
+    nodes = {pipe_name: list(model.walk()) for pipe_name, model in models.items()}
+    for entry in info["params"]:
+        start = entry["offset"] // dtype.itemsize
+        array = weights[start:start + int(np.prod(entry["shape"]))].reshape(entry["shape"])
+        if dtype != np.float32:
+            array = array.astype(np.float32)   # float16 files trade the sharing for half the disk size
+        nodes[entry["pipe"]][entry["node"]].set_param(entry["param"], array)
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def pack_entity_model(src=ENTITY_MODEL_PATH, dest=PACKED_ENTITY_PATH, dtype="float32", check_texts=None):
+    """
+    Writes the packed copy of the spaCy model at src to dest.
+    Raises ValueError (and leaves dest alone) if the packed model finds different entities on check_texts
+    (default: the notebook's test sentences).
+    """
+    import spacy
+    nlp = spacy.load(src)
+    check_texts = list(check_texts or NOTEBOOK_TEST_TEXTS)
+    expected = _entities(nlp, check_texts)
+
+    staging = dest.rstrip("/\\") + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    # the vocab only holds strings the tokenizer and the labels add back on load, and empty vectors/lookups
+    nlp.to_disk(staging, exclude=["vocab"])
+    index, arrays = _pack_weights(nlp, dtype)
+    _write_weights(os.path.join(staging, WEIGHTS_FILE), index, arrays, dtype)
+    _write_skeletons(nlp, staging)
+    info = {"dtype": dtype, "source_hash": artifact_hash((src,)), "params": index}
+    with open(os.path.join(staging, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=1)
+
+    packed = _load_packed(staging, info)
+    got = _entities(packed, check_texts)
+    mismatches = [text for text, a, b in zip(check_texts, expected, got) if a != b]
+    if mismatches:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise ValueError(f"Packed entity model disagrees with {src} on: {mismatches[:5]}")
+
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(staging, dest)
+    size = sum(array.nbytes for array in arrays)
+    print(f"✅ Packed entity model saved to {dest} ({len(index)} params, {size / 1e6:.1f} MB of {dtype} weights)")
+    return dest
+
+
+def _load_packed(path, info):
+    import spacy
+    nlp = spacy.load(path)
+    _map_weights(nlp, path, info)
+    return nlp
+
+
+def load_packed_entity_model(path=PACKED_ENTITY_PATH, source_path=ENTITY_MODEL_PATH):
+    """The packed spaCy pipeline with its weights memory-mapped, or None if it is missing or was packed from a different model."""
+    try:
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if info.get("source_hash") != artifact_hash((source_path,)):
+        print("⚠ Packed entity model is out of date, using the original (re-run: python entity_model.py)")
+        return None
+    return _load_packed(path, info)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the spaCy NER model for faster, shared loading.")
+    parser.add_argument("--model", default=ENTITY_MODEL_PATH)
+    parser.add_argument("--out", default=PACKED_ENTITY_PATH)
+    parser.add_argument("--float16", action="store_true",
+                        help="store half-precision weights: half the file size, but each process holds its own float32 copy")
+    args = parser.parse_args(argv)
+    pack_entity_model(args.model, args.out, dtype="float16" if args.float16 else "float32")
+
+
+if __name__ == "__main__":
+    main()
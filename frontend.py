@@ -1,7 +1,13 @@
 import streamlit as st
 from datetime import datetime
-from google_integration import get_calendar_service, get_existing_schedule
-from app import process_task
+from google_integration import get_calendar_service
+from model_registry import prewarm
+from schedule_cache import get_cached_schedule
+from task_db import task_db
+from keyword_matcher import first_keyword
+
+# start loading the shared models while the page renders
+prewarm()
 
 #---------------------------------------------------------
 # Page Config
@@ -91,6 +97,8 @@ if st.button("Process Task"):
         st.error("Please enter a task first!")
     else:
         with st.spinner("Analyzing task and scheduling..."):
+            # app (FastAPI and the whole API module) is only imported once a task is submitted, not on first paint
+            from app import process_task
             response = process_task(task_title)
 
         event_status = response.get("event_status", {})
@@ -108,7 +116,7 @@ st.subheader("Upcoming Events")
 
 try:
     service = get_calendar_service()
-    calendar_events = get_existing_schedule(service, lookahead_days=7)
+    calendar_events = get_cached_schedule(service, lookahead_days=7)
 except:
     st.warning("Unable to connect to Google Calendar.")
     calendar_events = []
@@ -116,13 +124,15 @@ except:
 if not calendar_events:
     st.info("No upcoming events found.")
 else:
+    # priorities stored by /process_task/ for events it created, no re-classification needed
+    stored_priorities = task_db.priorities_for_events([e.get("id") for e in calendar_events])
+
     def get_priority(event):
-        title = event["title"].lower()
-        if any(word in title for word in ["urgent", "important", "meeting", "exam", "assignment", "tonight", "boss"]):
-            return "high"
-        elif any(word in title for word in ["review", "call", "discussion"]):
-            return "medium"
-        return "low"
+        if event.get("id") in stored_priorities:
+            return stored_priorities[event["id"]]
+        # one pass over the title for the keyword sets in keywords.json
+        priority, _ = first_keyword(event["title"], "event_title")
+        return priority or "low"
     
     priorities = {
         "high": "High Priority",
@@ -2,10 +2,15 @@ import streamlit as st
 from datetime import datetime
 from google_integration import (
     get_calendar_service,
-    get_existing_schedule,
     add_task_to_calendar
 )
-from app import process_task
+from model_registry import prewarm
+from schedule_cache import get_cached_schedule
+from task_db import task_db
+from keyword_matcher import first_keyword
+
+# start loading the shared models while the page renders
+prewarm()
 
 #---------------------------------------------------------
 # Page Config
@@ -100,20 +105,22 @@ with col1:
 
     try:
         service = get_calendar_service()
-        calendar_events = get_existing_schedule(service, lookahead_days=7)
+        calendar_events = get_cached_schedule(service, lookahead_days=7)
     except:
         calendar_events = []
 
     if not calendar_events:
         st.info("No upcoming events found.")
     else:
+        # priorities stored by /process_task/ for events it created, no re-classification needed
+        stored_priorities = task_db.priorities_for_events([e.get("id") for e in calendar_events])
+
         def get_priority(event):
-            title = event["title"].lower()
-            if any(word in title for word in ["urgent", "important", "meeting", "exam"]):
-                return "high"
-            elif any(word in title for word in ["review", "call", "discussion"]):
-                return "medium"
-            return "low"
+            if event.get("id") in stored_priorities:
+                return stored_priorities[event["id"]]
+            # one pass over the title for the keyword sets in keywords.json
+            priority, _ = first_keyword(event["title"], "event_title")
+            return priority or "low"
         
         priorities = {
             "high": "High Priority",
@@ -148,6 +155,8 @@ with col2:
             st.error("Please enter a task first!")
         else:
             with st.spinner("Analyzing task and scheduling..."):
+                # app (FastAPI and the whole API module) is only imported once a task is submitted, not on first paint
+                from app import process_task
                 response = process_task(task_title)
 
             event_status = response.get("event_status", {})
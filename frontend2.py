@@ -1,11 +1,11 @@
 import streamlit as st
 from datetime import datetime, timedelta
-from google_integration import (
-    get_calendar_service,
-    get_existing_schedule,
-    add_task_to_calendar
-)
-from app import process_task, smart_reasoning_engine
+from google_integration import get_calendar_service
+from model_registry import prewarm
+from schedule_cache import get_cached_schedule
+
+# start loading the shared models while the page renders
+prewarm()
 
 st.set_page_config(page_title="Ascend", layout="centered")
 
@@ -68,21 +68,24 @@ if submit:
         with st.spinner("Analyzing and scheduling your task..."):
             # 1️⃣ Get calendar events
             service = get_calendar_service()
-            calendar_events = get_existing_schedule(service, lookahead_days=7)
+            calendar_events = get_cached_schedule(service, lookahead_days=7)
 
             # 2️⃣ Process the task
+            # app (FastAPI and the whole API module) is only imported once a task is submitted, not on first paint
+            from app import process_task, smart_reasoning_engine
             task_data = process_task(task_title)
             intent = task_data.get("intent")
-            entities = task_data.get("entities", {})
+            # the reasoning engine reads lowercase entity names
+            entities = {label.lower(): text for label, text in task_data.get("entities", {}).items()}
+            event_status = task_data.get("event_status", {})
 
             # 3️⃣ Compute reasoning
-            reasoning_result = smart_reasoning_engine(intent, entities, calendar_events)
+            reasoning_result = smart_reasoning_engine(intent, entities, calendar_events, event_status=event_status)
             st.subheader("🔍 Reasoning")
             st.write(reasoning_result["reasoning"])
 
-            # 4️⃣ Schedule if needed
-            if reasoning_result["schedule_on_calendar"]:
-                event_status = add_task_to_calendar(service, task_title)
+            # 4️⃣ process_task already created the event, show what happened
+            if reasoning_result["schedule_on_calendar"] or event_status.get("success"):
                 if event_status.get("success"):
                     st.success(f"✅ Event created! [Open in Calendar]({event_status.get('link')})")
                 else:
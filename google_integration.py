@@ -4,22 +4,66 @@
 # -----------------------
 from __future__ import print_function
 import os.path
-from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
-import pickle
-import streamlit as st
+import random
+import threading
+import time
+from schedule_cache import schedule_cache, event_to_schedule_item
+from stage_metrics import timed
+# the Google client libraries are imported on first use so importing this module stays cheap
 
 # -----------------------
 # Google Calendar Setup
 # -----------------------
 SCOPES = ['https://www.googleapis.com/auth/calendar']
+BATCH_SIZE = 50          # Calendar API limit for one batch request we stay within
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 1   # backoff is base * 2^attempt plus jitter
+
+_credentials = None
+_credentials_lock = threading.Lock()
+_services = {}          # thread id -> Calendar service
+_shared_service = None  # set by use_calendar_service, e.g. a fake calendar in benchmarks
+
 
-@st.cache_resource
 def get_calendar_service():
+    """
+    The Calendar service for the calling thread. The credentials are loaded once and shared, but each thread
+    gets its own service and so its own httplib2 connection, which is not safe to use from two threads at once.
+    """
+    if _shared_service is not None:
+        return _shared_service
+    thread_id = threading.get_ident()
+    service = _services.get(thread_id)
+    if service is None:
+        from googleapiclient.discovery import build
+        service = _services[thread_id] = build("calendar", "v3", credentials=get_credentials())
+    return service
+
+
+def use_calendar_service(service):
+    """Hands service to every thread from now on (None goes back to one real service per thread)."""
+    global _shared_service
+    _shared_service = service
+    _services.clear()
+
+
+def get_credentials():
+    """Loads (or asks for) the Calendar credentials on first use and shares them with every later caller."""
+    global _credentials
+    if _credentials is None:
+        with _credentials_lock:
+            if _credentials is None:
+                with timed("calendar_auth"):
+                    _credentials = _load_credentials()
+    return _credentials
+
+
+def _load_credentials():
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     creds = None
     # 1. Load saved token if available
     if os.path.exists("token.json"):
@@ -43,8 +87,7 @@ def get_calendar_service():
         with open("token.json", "w") as token:
             token.write(creds.to_json())
 
-    # 4. Build and return the Calendar service
-    return build("calendar", "v3", credentials=creds)
+    return creds
 
 
 # -----------------------
@@ -71,47 +114,142 @@ def list_upcoming_events(service, max_results=5):
 # -----------------------
 # Add a Task to Calendar
 # -----------------------
+def build_event_body(task):
+    """Builds the Calendar API event body for a task dict with title, start_time and duration_minutes."""
+    # Compute event times
+    start_time = task.get("start_time") #uses get to avoid crashing
+    if not start_time: #if its none 
+        raise ValueError("Missing start_time for calendar event.")
+
+    duration = task.get("duration_minutes", 60) #60 is the default value
+    end_time = start_time + timedelta(minutes=duration)
+    print(f"start time before creating event: {start_time.isoformat()}")
+    print(f"end time before creating event: {end_time.isoformat()}")
+    # Build Google Calendar event
+    return {
+        'summary': f'Task: {task.get("title") or "Untitled Task"}',
+        'start': {'dateTime': start_time.isoformat(), 'timeZone': 'Asia/Karachi'},
+        'end': {'dateTime': end_time.isoformat(), 'timeZone': 'Asia/Karachi'},
+    }
+
+
 def add_task_to_calendar(service, task):
     """
     Add a task to Google Calendar as an event.
-    Returns a dict: {"success": True/False, "link": event_link or None, "error": message or None}
+    Returns a dict: {"success": True/False, "link": event_link or None, "error": message or None,
+                     "event_id": id of the created event or None}
     """
-    try:
-        # Compute event times
-        start_time = task.get("start_time") #uses get to avoid crashing
-        if not start_time: #if its none 
-            raise ValueError("Missing start_time for calendar event.")
-
-        duration = task.get("duration_minutes", 60) #60 is the default value
-        end_time = start_time + timedelta(minutes=duration)
-        print(f"start time before creating event: {start_time.isoformat()}")
-        print(f"end time before creating event: {end_time.isoformat()}")
-        # Build Google Calendar event
-        event = {
-            'summary': f'Task: {task.get("title") or "Untitled Task"}',
-            'start': {'dateTime': start_time.isoformat(), 'timeZone': 'Asia/Karachi'},
-            'end': {'dateTime': end_time.isoformat(), 'timeZone': 'Asia/Karachi'},
-        }
-
-        # Attempt to create event
-        print("Sending event to Google Calendar:", event)
-        created_event = service.events().insert(calendarId='primary', body=event).execute()
-        print("Google response:", created_event)
-
-
-        link = created_event.get('htmlLink')
-        print(f"✅ Event created: {link}")
-        return {"success": True, "link": link, "error": None}
+    with timed("calendar_insert") as stage:
+        try:
+            event = build_event_body(task)
 
-    except Exception as e:
-        print("❌ Error adding event to Google Calendar:", e)
-        return {"success": False, "link": None, "error": str(e)}
+            # Attempt to create event
+            print("Sending event to Google Calendar:", event)
+            created_event = service.events().insert(calendarId='primary', body=event).execute()
+            print("Google response:", created_event)
+
+
+            link = created_event.get('htmlLink')
+            print(f"✅ Event created: {link}")
+            # the cached schedule no longer matches the calendar
+            schedule_cache.invalidate()
+            return {"success": True, "link": link, "error": None, "event_id": created_event.get('id')}
 
+        except Exception as e:
+            print("❌ Error adding event to Google Calendar:", e)
+            stage.fail()
+            return {"success": False, "link": None, "error": str(e), "event_id": None}
+
+
+# -----------------------
+# Add many Tasks in Batches
+# -----------------------
+def _is_retryable(error):
+    """Rate limits (403/429) and server errors (5xx) are worth retrying, anything else is not."""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is None:
+        return False
+    status = int(status)
+    if status == 403:
+        content = getattr(error, 'content', b'') or b''
+        return b'rateLimitExceeded' in content or b'userRateLimitExceeded' in content
+    return status == 429 or status >= 500
+
+
+def add_tasks_to_calendar(service, tasks, batch_size=BATCH_SIZE, max_retries=MAX_RETRIES, http=None, sleep=time.sleep):
+    """
+    Adds many tasks to Google Calendar with batched HTTP requests (up to batch_size inserts each).
+    Returns one {"success", "link", "error", "event_id"} dict per task, in the same order as tasks.
+    Pass http (e.g. googleapiclient.http.HttpMockSequence) to run against a fake transport.
+    """
+    results = [None] * len(tasks)
+    pending = []
+    for i, task in enumerate(tasks):
+        try:
+            pending.append((i, build_event_body(task)))
+        except Exception as e:
+            results[i] = {"success": False, "link": None, "error": str(e), "event_id": None}
+
+    for chunk_start in range(0, len(pending), batch_size):
+        chunk = pending[chunk_start:chunk_start + batch_size]
+        attempt = 0
+        while chunk:
+            retry = _execute_batch(service, chunk, results, http)
+            if not retry:
+                break
+            if attempt >= max_retries:
+                # give up, the last error is already in results
+                break
+            delay = RETRY_BASE_SECONDS * (2 ** attempt) + random.uniform(0, RETRY_BASE_SECONDS)
+            print(f"⚠ Retrying {len(retry)} calendar inserts in {delay:.1f}s")
+            sleep(delay)
+            attempt += 1
+            chunk = retry
+
+    if any(result["success"] for result in results):
+        # the cached schedule no longer matches the calendar
+        schedule_cache.invalidate()
+    return results
+
+
+def _execute_batch(service, chunk, results, http):
+    """Sends one batch, fills results in place and returns the (index, event) pairs to retry."""
+    events_by_id = {str(i): (i, event) for i, event in chunk}
+    retry = []
+
+    def callback(request_id, response, exception):
+        i, event = events_by_id[request_id]
+        if exception is None:
+            results[i] = {"success": True, "link": response.get('htmlLink'), "error": None, "event_id": response.get('id')}
+            return
+        results[i] = {"success": False, "link": None, "error": str(exception), "event_id": None}
+        if _is_retryable(exception):
+            retry.append((i, event))
+
+    batch = service.new_batch_http_request(callback=callback)
+    for i, event in chunk:
+        batch.add(service.events().insert(calendarId='primary', body=event), request_id=str(i))
+
+    try:
+        with timed("calendar_batch_insert") as stage:
+            batch.execute(http=http)
+            if retry:
+                stage.fail()
+    except Exception as e:
+        # the whole batch failed in transport, retry every request that has no answer yet
+        print("❌ Calendar batch request failed:", e)
+        for i, event in chunk:
+            if results[i] is None or not results[i]["success"]:
+                results[i] = {"success": False, "link": None, "error": str(e), "event_id": None}
+                if (i, event) not in retry:
+                    retry.append((i, event))
+    return retry
 
 
 def get_existing_schedule(service, lookahead_days=7):
     """
     Fetches upcoming Google Calendar events within the next `lookahead_days`.
+    Goes straight to the API; use schedule_cache.get_cached_schedule to reuse a synced snapshot.
     Returns a list like:
     [
         {"title": "Meeting", "start": datetime, "end": datetime},
@@ -121,25 +259,27 @@ def get_existing_schedule(service, lookahead_days=7):
     now = datetime.utcnow().isoformat() + 'Z'  # current UTC time
     max_time = (datetime.utcnow() + timedelta(days=lookahead_days)).isoformat() + 'Z'
 
-    events_result = service.events().list(
-        calendarId='primary',
-        timeMin=now,
-        timeMax=max_time,
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
-
-    events = events_result.get('items', [])
     schedule = []
+    page_token = None
+    while True:
+        with timed("calendar_list"):
+            events_result = service.events().list(
+                calendarId='primary',
+                timeMin=now,
+                timeMax=max_time,
+                singleEvents=True,
+                orderBy='startTime',
+                pageToken=page_token
+            ).execute()
+
+        for event in events_result.get('items', []):
+            item = event_to_schedule_item(event)
+            if item:
+                schedule.append(item)
 
-    for event in events:
-        start = event['start'].get('dateTime')
-        end = event['end'].get('dateTime')
-        if start and end:
-            schedule.append({
-                "title": event['summary'],
-                "start": datetime.fromisoformat(start.replace("Z","")),
-                "end": datetime.fromisoformat(end.replace("Z",""))
-            })
+        # follow pagination, busy calendars don't fit in one page
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            break
 
     return schedule
@@ -0,0 +1,300 @@
+#this file caches intent + entity results so repeated commands skip the TF-IDF / LogisticRegression and spaCy stages
+#commands with a fixed shape are answered by pre_router before the cache is even looked at
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from model_registry import get_models, model_version
+from pre_router import route, should_shadow, router_stats
+from stage_metrics import timed
+from inference_pool import inference_pool
+import coalescer
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+MEMORY_CACHE_SIZE = 4096                  # commands kept in the in-process LRU
+DISK_CACHE_PATH = "inference_cache.db"    # SQLite tier that survives restarts, None to turn it off
+
+DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inference_cache (
+    key TEXT PRIMARY KEY,
+    version TEXT,
+    result TEXT,
+    compute_seconds REAL
+)
+"""
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def normalize_command(command):
+    """Strips and collapses whitespace. Case is kept because the NER model is case sensitive."""
+    return " ".join(command.split())
+
+
+def cache_key(command, version):
+    """sha256 of the model version and the normalized command."""
+    return hashlib.sha256(f"{version}\0{normalize_command(command)}".encode()).hexdigest()
+
+
+def _copy(result):
+    # callers get their own entities dict, the cached one is never handed out
+    return {"intent": result["intent"], "entities": dict(result["entities"])}
+
+
+#---------------------------------------------------------
+# inference cache
+#---------------------------------------------------------
+class InferenceCache:
+    """
+    {"intent", "entities"} per command, in an LRU in front of an optional SQLite table.
+    Keys include the model artifact hash, so changed model files never serve old results;
+    the old entries are dropped the first time the new version is seen.
+    """
+
+    def __init__(self, max_entries=MEMORY_CACHE_SIZE, disk_path=DISK_CACHE_PATH, version=model_version):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.version = version
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = None
+        self.current_version = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _disk(self):
+        if self.disk_path is None:
+            return None
+        if self.conn is None:
+            try:
+                conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                with conn:
+                    conn.execute(DISK_SCHEMA)
+                self.conn = conn
+            except sqlite3.Error as e:
+                print("⚠ Inference disk cache disabled:", e)
+                self.disk_path = None
+                return None
+        return self.conn
+
+    def _check_version(self):
+        """Current model version; on a change the memory tier is cleared and stale disk rows deleted."""
+        version = self.version()
+        if version != self.current_version:
+            self.entries.clear()
+            conn = self._disk()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM inference_cache WHERE version != ?", (version,))
+            self.current_version = version
+        return version
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, command):
+        """Cached result for command, or None."""
+        with self.lock:
+            key = cache_key(command, self._check_version())
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+            else:
+                conn = self._disk()
+                row = conn and conn.execute(
+                    "SELECT result, compute_seconds FROM inference_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    self.misses += 1
+                    return None
+                entry = (json.loads(row[0]), row[1])
+                self._remember(key, entry)
+                self.disk_hits += 1
+            result, compute_seconds = entry
+            self.saved_seconds += compute_seconds
+            return _copy(result)
+
+    def put_many(self, items):
+        """Stores (command, result, compute_seconds) tuples."""
+        with self.lock:
+            version = self._check_version()
+            rows = []
+            for command, result, compute_seconds in items:
+                key = cache_key(command, version)
+                result = _copy(result)
+                self._remember(key, (result, compute_seconds))
+                rows.append((key, version, json.dumps(result), compute_seconds))
+            conn = self._disk()
+            if conn is not None and rows:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO inference_cache VALUES (?, ?, ?, ?)", rows)
+
+    def put(self, command, result, compute_seconds):
+        self.put_many([(command, result, compute_seconds)])
+
+    def clear(self):
+        """Empties both tiers and resets the counters."""
+        with self.lock:
+            self.entries.clear()
+            conn = self._disk()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM inference_cache")
+            self.memory_hits = self.disk_hits = self.misses = 0
+            self.saved_seconds = 0.0
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 4),
+            "size": len(self.entries),
+            "max_size": self.max_entries,
+            "disk": self.disk_path,
+            "model_version": self.current_version,
+        }
+
+
+# shared instance used by the API and db_management
+inference_cache = InferenceCache()
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def run_models(commands, batch_size=64, n_process=1):
+    """
+    Intent classifier + spaCy over the commands, no cache and no rules. Returns (results, seconds).
+    Runs in the inference pool's worker processes when it is started, in this process otherwise.
+    """
+    start = time.perf_counter()
+    if inference_pool.running:
+        # worker processes, batched together with whatever other requests are classifying right now
+        with timed("inference_pool"):
+            results = inference_pool.classify_many(commands)
+    else:
+        intent_clf, entity_clf = get_models("intent_clf", "entity_clf")
+        with timed("intent"):
+            intents = intent_clf.predict(commands)
+        with timed("ner"):
+            docs = list(entity_clf.pipe(commands, batch_size=batch_size, n_process=n_process))
+        results = [
+            {"intent": str(intent), "entities": {ent.label_: ent.text for ent in doc.ents}}
+            for intent, doc in zip(intents, docs)
+        ]
+    seconds = time.perf_counter() - start
+    router_stats.record_model_time(seconds, len(commands))
+    return results, seconds
+
+
+# concurrent single-command requests share one model call (the pool batches on its own)
+request_coalescer = coalescer.RequestCoalescer(run_models)
+
+
+def _from_route(routed):
+    return {"intent": routed["intent"], "entities": routed["entities"]}
+
+
+def classify(command):
+    """{"intent", "entities"} for one command: pre_router rules, then the cache, then the models."""
+    routed = route(command)
+    if routed is not None:
+        if should_shadow():
+            router_stats.record_shadow(routed, _classify_cached(command))
+        return _from_route(routed)
+    return _classify_cached(command)
+
+
+def _classify_cached(command):
+    result = inference_cache.get(command)
+    if result is not None:
+        return result
+
+    if coalescer.ENABLED and not inference_pool.running:
+        result, seconds = request_coalescer.classify(command)
+    else:
+        (result,), seconds = run_models([command])
+    inference_cache.put(command, result, seconds)
+    return result
+
+
+def classify_many(commands, batch_size=64, n_process=1):
+    """
+    Same as classify for a list of commands. Whatever the rules and the cache can't answer goes
+    through the models in one predict call and one nlp.pipe pass. Results are in input order.
+    """
+    results = [None] * len(commands)
+    shadowed = {}
+    remaining = []
+    for i, command in enumerate(commands):
+        routed = route(command)
+        if routed is None:
+            remaining.append(i)
+            continue
+        results[i] = _from_route(routed)
+        if should_shadow():
+            shadowed[i] = routed
+            remaining.append(i)
+
+    model_results = _classify_many_cached([commands[i] for i in remaining], batch_size, n_process)
+    for i, result in zip(remaining, model_results):
+        if i in shadowed:
+            router_stats.record_shadow(shadowed[i], result)
+        else:
+            results[i] = result
+    return results
+
+
+def _classify_many_cached(commands, batch_size, n_process):
+    results = [inference_cache.get(command) for command in commands]
+
+    # identical commands in one batch are classified once
+    pending = {}
+    for i, result in enumerate(results):
+        if result is None:
+            pending.setdefault(normalize_command(commands[i]), []).append(i)
+    if not pending:
+        return results
+
+    misses = [commands[positions[0]] for positions in pending.values()]
+    computed, seconds = run_models(misses, batch_size=batch_size, n_process=n_process)
+    per_command = seconds / len(misses)
+
+    inference_cache.put_many([(command, result, per_command) for command, result in zip(misses, computed)])
+    for positions, result in zip(pending.values(), computed):
+        for i in positions:
+            results[i] = _copy(result)
+    return results
+
+
+def cache_stats():
+    return inference_cache.stats()
+
+
+def pre_router_stats():
+    return router_stats.snapshot()
+
+
+def coalescer_stats():
+    return request_coalescer.stats()
@@ -0,0 +1,216 @@
+#this file runs the intent classifier and spaCy NER in a pool of worker processes
+#spaCy holds the GIL, so in-process inference uses one core however many requests are waiting;
+#each worker loads the models once and classifies micro-batches (flushed after MAX_BATCH commands or MAX_WAIT_MS)
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+WORKERS = 2           # worker processes, each with its own copy of the models
+MAX_BATCH = 64        # commands per nlp.pipe call in a worker
+MAX_WAIT_MS = 5       # how long a batch waits for more commands before it is sent anyway
+
+
+#---------------------------------------------------------
+# worker process side
+#---------------------------------------------------------
+def _load_models():
+    from model_registry import get_intent_clf, get_entity_clf
+    get_intent_clf()
+    get_entity_clf()
+
+
+def _classify_batch(commands):
+    """Runs in a worker: one predict call and one nlp.pipe pass. Returns [{"intent", "entities"}]."""
+    from model_registry import get_models, model_version
+    model_version()   # re-checks the model files, a retrained model is swapped in here too
+    intent_clf, entity_clf = get_models("intent_clf", "entity_clf")
+    intents = intent_clf.predict(commands)
+    docs = entity_clf.pipe(commands, batch_size=len(commands))
+    return [
+        {"intent": str(intent), "entities": {ent.label_: ent.text for ent in doc.ents}}
+        for intent, doc in zip(intents, docs)
+    ]
+
+
+#---------------------------------------------------------
+# pool
+#---------------------------------------------------------
+class InferencePool:
+    """
+    submit(command) returns a concurrent.futures.Future for {"intent", "entities"}.
+    A dispatcher thread groups queued commands into batches and sends at most one batch per idle worker,
+    so commands that arrive while every worker is busy join the next batch instead of waiting in line.
+    """
+
+    def __init__(self, workers=WORKERS, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.executor = None
+        self.broken = False
+        self.idle_workers = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.commands = 0
+        self.errors = 0
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, wait=True):
+        """Starts the worker processes (spawned, not forked) and loads the models in each of them."""
+        with self.lock:
+            if self.running:
+                return self
+            self._new_executor()
+            self.idle_workers = threading.Semaphore(self.workers)
+            self.thread = threading.Thread(target=self._dispatch, name="inference-pool", daemon=True)
+            self.thread.start()
+        if wait:
+            # every worker runs the initializer before its first task
+            for future in [self.executor.submit(time.sleep, 0.05) for _ in range(self.workers)]:
+                future.result()
+        print(f"✅ Inference pool started with {self.workers} workers")
+        return self
+
+    def _new_executor(self):
+        context = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_load_models)
+        self.broken = False
+
+    def stop(self):
+        with self.lock:
+            if not self.running:
+                return
+            self.queue.put(None)
+            self.thread.join()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.thread = None
+
+    def submit(self, command):
+        future = Future()
+        self.queue.put((command, future))
+        return future
+
+    def classify_many(self, commands):
+        """Blocking: results for every command, in order. Big lists are spread over all workers."""
+        futures = [self.submit(command) for command in commands]
+        return [future.result() for future in futures]
+
+    def _next_batch(self):
+        """Waits for a first command, then up to max_wait for more. Returns (batch, stop)."""
+        item = self.queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        flush_at = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = flush_at - time.monotonic()
+            try:
+                item = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _fill(self, batch):
+        """Tops the batch up with whatever queued while we waited for a worker. Returns stop."""
+        while len(batch) < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _dispatch(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if not batch:
+                break
+            self.idle_workers.acquire()
+            if not stop:
+                stop = self._fill(batch)
+            self.batches += 1
+            self.commands += len(batch)
+            try:
+                done = self._submit([command for command, _ in batch])
+            except Exception as e:
+                self.idle_workers.release()
+                self._fail(batch, e)
+                continue
+            done.add_done_callback(partial(self._deliver, batch))
+
+    def _submit(self, commands):
+        """Sends a batch to the workers. If a worker died (e.g. killed for memory) the pool is replaced first."""
+        if not self.broken:
+            try:
+                return self.executor.submit(_classify_batch, commands)
+            except BrokenProcessPool:
+                pass
+        print("⚠ Restarting inference workers")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._new_executor()
+        return self.executor.submit(_classify_batch, commands)
+
+    def _deliver(self, batch, done):
+        self.idle_workers.release()
+        try:
+            results = done.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self.broken = True
+            self._fail(batch, e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _fail(self, batch, error):
+        self.errors += 1
+        print("❌ Inference worker failed:", error)
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "batches": self.batches,
+            "commands": self.commands,
+            "mean_batch_size": round(self.commands / self.batches, 2) if self.batches else None,
+            "errors": self.errors,
+        }
+
+
+# shared instance, started by app.py when INFERENCE_WORKERS > 0
+inference_pool = InferencePool()
+
+
+def start_inference_pool(workers=WORKERS, wait=True):
+    inference_pool.workers = workers
+    return inference_pool.start(wait=wait)
+
+
+def inference_pool_stats():
+    return inference_pool.stats()
@@ -0,0 +1,264 @@
+#this file freezes the fitted TF-IDF + LogisticRegression intent pipeline into plain NumPy arrays
+#so predicting one command is a dict lookup per word and one small dot product instead of a full sklearn call
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import json
+import re
+import numpy as np
+from model_registry import INTENT_MODEL_PATH, artifact_hash
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+COMPILED_INTENT_PATH = "models/intent_classifier.npz"
+
+# test set from models.ipynb, used to check a compiled model before it is saved
+NOTEBOOK_TEST_TEXTS = [
+    "Please add 'buy dog food' to my to-do list",
+    "Add take out trash as a new task",
+    "Put 'practice coding' into my planner",
+    "Mark 'finish project' as top priority",
+    "Set the priority for 'study math' to low",
+    "Make 'clean garage' an urgent task",
+    "Remind me to book dentist by next Thursday",
+    "Finish assignment before next weekend",
+    "Set deadline for 'insurance renewal' to Aug 5",
+    "Delete the task about going to the gym",
+    "Remove 'text Alice' from my tasks",
+    "Please get rid of 'review notes' from my list",
+    "Change the priority of 'do taxes' to low",
+    "Edit the task to say 'email professor instead'",
+    "Update 'go shopping' to 'go grocery shopping'",
+]
+NOTEBOOK_TEST_LABELS = (["Add Task"] * 3 + ["Set Priority"] * 3 + ["Set Deadline"] * 3
+                        + ["Delete Task"] * 3 + ["Edit Task"] * 3)
+
+
+#---------------------------------------------------------
+# compiled classifier
+#---------------------------------------------------------
+class CompiledIntentClassifier:
+    """
+    Drop-in replacement for intent_clf.predict: same tokenization, tf-idf weighting and
+    normalization as the fitted TfidfVectorizer, then a sparse dot product with the
+    LogisticRegression coefficients and an argmax.
+    """
+
+    def __init__(self, vocabulary, idf, coef, intercept, classes, token_pattern=r"(?u)\b\w\w+\b",
+                 lowercase=True, stop_words=None, ngram_range=(1, 1), binary=False, sublinear_tf=False,
+                 norm="l2", source_hash=None):
+        if norm not in ("l1", "l2", None):
+            raise ValueError(f"Unsupported norm: {norm}")
+        self.vocabulary = dict(vocabulary)
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float64)
+        # (features, classes) so one command's scores are weights[cols] summed over its words
+        self.weights = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        self.token_pattern = token_pattern
+        self.token_re = re.compile(token_pattern)
+        self.lowercase = lowercase
+        self.stop_words = frozenset(stop_words or ())
+        self.ngram_range = tuple(ngram_range)
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.source_hash = source_hash
+
+    @classmethod
+    def from_pipeline(cls, pipeline, source_hash=None):
+        """Compiles a fitted Pipeline([('tfidf', TfidfVectorizer()), ('clf', LogisticRegression())])."""
+        vectorizer = pipeline.steps[0][1]
+        clf = pipeline.steps[-1][1]
+
+        # only the options the notebook's vectorizer can use are reproduced
+        if getattr(vectorizer, "analyzer", None) != "word":
+            raise ValueError("Only word analyzers can be compiled")
+        if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+            raise ValueError("Custom preprocessors / tokenizers can't be compiled")
+        if vectorizer.strip_accents is not None:
+            raise ValueError("strip_accents can't be compiled")
+
+        use_idf = getattr(vectorizer, "use_idf", False)
+        return cls(
+            vocabulary=vectorizer.vocabulary_,
+            idf=vectorizer.idf_ if use_idf else None,
+            coef=clf.coef_,
+            intercept=clf.intercept_,
+            classes=clf.classes_,
+            token_pattern=vectorizer.token_pattern,
+            lowercase=vectorizer.lowercase,
+            stop_words=vectorizer.get_stop_words(),
+            ngram_range=vectorizer.ngram_range,
+            binary=vectorizer.binary,
+            sublinear_tf=getattr(vectorizer, "sublinear_tf", False),
+            norm=getattr(vectorizer, "norm", None),
+            source_hash=source_hash,
+        )
+
+    def _terms(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_re.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        # same order as sklearn's _word_ngrams
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                terms.append(" ".join(tokens[i:i + n]))
+        return terms
+
+    def _sparse(self, texts):
+        """Rows, feature columns and normalized tf-idf values of the texts (a CSR matrix in COO form)."""
+        vocabulary = self.vocabulary
+        cols = []
+        counts = []
+        lengths = []
+        for text in texts:
+            row = {}
+            for term in self._terms(text):
+                col = vocabulary.get(term)
+                if col is not None:
+                    row[col] = row.get(col, 0) + 1
+            cols.extend(row)
+            counts.extend(row.values())
+            lengths.append(len(row))
+
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        cols = np.array(cols, dtype=np.intp)
+        values = np.array(counts, dtype=np.float64)
+        if self.binary:
+            values[:] = 1.0
+        elif self.sublinear_tf:
+            values = np.log(values) + 1.0
+        if self.idf is not None:
+            values *= self.idf[cols]
+        if self.norm is not None:
+            magnitudes = values * values if self.norm == "l2" else np.abs(values)
+            totals = np.bincount(rows, weights=magnitudes, minlength=len(lengths))
+            if self.norm == "l2":
+                totals = np.sqrt(totals)
+            totals[totals == 0] = 1.0
+            values /= totals[rows]
+        return rows, cols, values
+
+    def decision_function(self, texts):
+        """(n_texts, n_classes) scores, or (n_texts,) for a binary model, like LogisticRegression."""
+        texts = list(texts)
+        rows, cols, values = self._sparse(texts)
+        contributions = values[:, None] * self.weights[cols]
+        scores = np.empty((len(texts), self.weights.shape[1]))
+        # one bincount per class is the sparse matrix product, classes are few
+        for k in range(scores.shape[1]):
+            scores[:, k] = np.bincount(rows, weights=contributions[:, k], minlength=len(texts))
+        scores += self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict(self, texts):
+        scores = self.decision_function(texts)
+        if scores.ndim == 1:
+            return self.classes[(scores > 0).astype(np.intp)]
+        return self.classes[scores.argmax(axis=1)]
+
+    def save(self, path=COMPILED_INTENT_PATH):
+        config = {
+            "token_pattern": self.token_pattern,
+            "lowercase": self.lowercase,
+            "stop_words": sorted(self.stop_words),
+            "ngram_range": list(self.ngram_range),
+            "binary": self.binary,
+            "sublinear_tf": self.sublinear_tf,
+            "norm": self.norm,
+            "source_hash": self.source_hash,
+        }
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        # np.savez appends .npz to any other extension, so write through a file object
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(terms, dtype=str),
+                columns=np.array([self.vocabulary[term] for term in terms], dtype=np.int64),
+                idf=self.idf if self.idf is not None else np.empty(0),
+                coef=self.weights.T,
+                intercept=self.intercept,
+                classes=np.array(self.classes, dtype=str),
+                config=np.array(json.dumps(config)),
+            )
+
+    @classmethod
+    def load(cls, path=COMPILED_INTENT_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            idf = data["idf"]
+            return cls(
+                vocabulary=zip(data["terms"].tolist(), data["columns"].tolist()),
+                idf=idf if idf.size else None,
+                coef=data["coef"],
+                intercept=data["intercept"],
+                classes=data["classes"].astype(object),
+                token_pattern=config["token_pattern"],
+                lowercase=config["lowercase"],
+                stop_words=config["stop_words"],
+                ngram_range=config["ngram_range"],
+                binary=config["binary"],
+                sublinear_tf=config["sublinear_tf"],
+                norm=config["norm"],
+                source_hash=config["source_hash"],
+            )
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def export_intent_classifier(pipeline_path=INTENT_MODEL_PATH, out_path=COMPILED_INTENT_PATH, check_texts=None):
+    """
+    Compiles the pickled pipeline and saves it next to it.
+    Raises ValueError (and saves nothing) if the compiled model disagrees with the pickle on check_texts
+    (default: the notebook's test set).
+    """
+    import joblib
+    pipeline = joblib.load(pipeline_path)
+    engine = CompiledIntentClassifier.from_pipeline(pipeline, source_hash=artifact_hash((pipeline_path,)))
+
+    check_texts = list(check_texts or NOTEBOOK_TEST_TEXTS)
+    expected = [str(label) for label in pipeline.predict(check_texts)]
+    got = [str(label) for label in engine.predict(check_texts)]
+    mismatches = [text for text, a, b in zip(check_texts, expected, got) if a != b]
+    if mismatches:
+        raise ValueError(f"Compiled intent model disagrees with the pickle on: {mismatches[:5]}")
+
+    engine.save(out_path)
+    print(f"✅ Compiled intent model saved to {out_path} ({len(engine.vocabulary)} terms, {len(engine.classes)} intents)")
+    return engine
+
+
+def load_compiled_intent_classifier(path=COMPILED_INTENT_PATH, source_path=INTENT_MODEL_PATH):
+    """The compiled model, or None if it is missing or was built from a different pickle."""
+    try:
+        engine = CompiledIntentClassifier.load(path)
+    except (OSError, KeyError, ValueError):
+        return None
+    if engine.source_hash != artifact_hash((source_path,)):
+        print("⚠ Compiled intent model is out of date, using the pickle (re-run: python intent_engine.py)")
+        return None
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the intent classifier pickle into a NumPy model.")
+    parser.add_argument("--pipeline", default=INTENT_MODEL_PATH)
+    parser.add_argument("--out", default=COMPILED_INTENT_PATH)
+    args = parser.parse_args(argv)
+    export_intent_classifier(args.pipeline, args.out)
+
+
+if __name__ == "__main__":
+    main()
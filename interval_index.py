@@ -0,0 +1,91 @@
+#this file builds a sorted index over calendar events so conflict checks don't scan the whole schedule
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+import pytz
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+LOCAL_TZ = pytz.timezone("Asia/Karachi")   # naive datetimes are assumed to be local time
+
+
+def to_utc(dt):
+    """Makes a datetime timezone-aware (naive = Asia/Karachi) and converts it to UTC."""
+    if dt.tzinfo is None:
+        dt = LOCAL_TZ.localize(dt)
+    return dt.astimezone(pytz.utc)
+
+
+#---------------------------------------------------------
+# interval index
+#---------------------------------------------------------
+class IntervalIndex:
+    """
+    Events from one schedule snapshot, sorted by start time with every datetime in aware UTC.
+    Answers overlap and free-slot queries with bisect instead of a linear scan.
+    """
+
+    def __init__(self, schedule):
+        events = []
+        for event in schedule:
+            start = to_utc(event["start"])
+            end = to_utc(event["end"])
+            events.append((start, end, event))
+        events.sort(key=lambda item: item[0])
+
+        self.events = [event for _, _, event in events]
+        self.starts = [start for start, _, _ in events]
+        self.ends = [end for _, end, _ in events]
+        self.max_duration = max((end - start for start, end, _ in events), default=timedelta(0))
+
+        # prefix maximum of end times: the latest end among events[0..i]
+        self.max_end = []
+        latest = None
+        for end in self.ends:
+            latest = end if latest is None or end > latest else latest
+            self.max_end.append(latest)
+
+        # merged busy intervals, disjoint and sorted, for free-slot queries
+        self.busy_starts = []
+        self.busy_ends = []
+        for start, end in zip(self.starts, self.ends):
+            if self.busy_ends and start <= self.busy_ends[-1]:
+                if end > self.busy_ends[-1]:
+                    self.busy_ends[-1] = end
+            else:
+                self.busy_starts.append(start)
+                self.busy_ends.append(end)
+
+    def __len__(self):
+        return len(self.events)
+
+    def overlaps_any(self, start, end):
+        """True if [start, end) overlaps any event."""
+        start, end = to_utc(start), to_utc(end)
+        # events starting before `end` are events[0..i); one of them must end after `start`
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.max_end[i - 1] > start
+
+    def overlapping(self, start, end):
+        """Events overlapping [start, end), ordered by start time."""
+        start, end = to_utc(start), to_utc(end)
+        # nothing starting before start - max_duration can still be running at `start`
+        lo = bisect_left(self.starts, start - self.max_duration)
+        hi = bisect_left(self.starts, end)
+        return [self.events[i] for i in range(lo, hi) if self.ends[i] > start]
+
+    def next_free_slot(self, after, duration_minutes):
+        """Earliest start >= after (in UTC) where duration_minutes fit without overlapping any event."""
+        candidate = to_utc(after)
+        duration = timedelta(minutes=duration_minutes)
+
+        # first busy interval that hasn't finished by `candidate`
+        j = bisect_right(self.busy_ends, candidate)
+        while j < len(self.busy_starts) and self.busy_starts[j] < candidate + duration:
+            candidate = max(candidate, self.busy_ends[j])
+            j += 1
+        return candidate
@@ -0,0 +1,88 @@
+#this file matches every priority keyword set in one regex pass over the text
+#keywords are whole words ("high" doesn't match "highway"), plurals like "meetings" still count
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import json
+import re
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+KEYWORDS_PATH = "keywords.json"
+
+
+#---------------------------------------------------------
+# keyword matcher
+#---------------------------------------------------------
+class KeywordMatcher:
+    """
+    keyword_sets: {set name: {category: {"weight": int, "words": [...]}}}, categories in priority order.
+    All sets are compiled into a single alternation, so one scan of the text finds every match.
+    """
+
+    def __init__(self, keyword_sets):
+        self.keyword_sets = keyword_sets
+        self.order = {
+            set_name: list(categories)
+            for set_name, categories in keyword_sets.items()
+        }
+
+        # word -> [(set name, category, weight)], a word may belong to several sets
+        self.lookup = {}
+        for set_name, categories in keyword_sets.items():
+            for category, spec in categories.items():
+                for word in spec["words"]:
+                    key = " ".join(word.lower().split())
+                    self.lookup.setdefault(key, []).append((set_name, category, spec.get("weight", 0)))
+
+        # longest first so "turn in" wins over a shorter word at the same position
+        words = sorted(self.lookup, key=len, reverse=True)
+        alternation = "|".join(r"\s+".join(re.escape(part) for part in word.split()) for word in words)
+        self.pattern = re.compile(rf"\b(?:{alternation})(?:e?s)?\b", re.IGNORECASE) if words else None
+
+    def _entries(self, found):
+        key = " ".join(found.lower().split())
+        for candidate in (key, key[:-2], key[:-1]):
+            if candidate in self.lookup:
+                return self.lookup[candidate]
+        return ()
+
+    def matches(self, text):
+        """{set name: {category: weight}} for every keyword in text, in one pass."""
+        result = {}
+        if not text or self.pattern is None:
+            return result
+        for found in self.pattern.finditer(text):
+            for set_name, category, weight in self._entries(found.group()):
+                result.setdefault(set_name, {})[category] = weight
+        return result
+
+    def first(self, text, set_name, matches=None):
+        """(category, weight) of the highest-priority category of set_name found in text, or (None, 0)."""
+        found = (matches if matches is not None else self.matches(text)).get(set_name, {})
+        for category in self.order.get(set_name, ()):
+            if category in found:
+                return category, found[category]
+        return None, 0
+
+
+def load_keyword_sets(path=KEYWORDS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# shared instance used by the API and the frontends
+keyword_matcher = KeywordMatcher(load_keyword_sets())
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def match_keywords(text):
+    return keyword_matcher.matches(text)
+
+
+def first_keyword(text, set_name):
+    return keyword_matcher.first(text, set_name)
@@ -0,0 +1,361 @@
+#this file loads the NLP models once and shares the same instances between the API, the db code and the frontends
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import hashlib
+import json
+import os
+import threading
+import time
+
+#---------------------------------------------------------
+# model locations
+#---------------------------------------------------------
+MODELS_DIR = "models"
+VERSIONS_DIR = "models/versions"   # timestamped artifacts written by python train.py
+CURRENT_PATH = "models/CURRENT"    # name of the active version; without it the models directly in models/ are used
+MANIFEST_FILE = "manifest.json"
+INTENT_FILE = "intent_classifier.pkl"
+ENTITY_DIR = "entity_clf"
+
+INTENT_MODEL_PATH = os.path.join(MODELS_DIR, INTENT_FILE)
+ENTITY_MODEL_PATH = os.path.join(MODELS_DIR, ENTITY_DIR)
+ARTIFACT_PATHS = (INTENT_MODEL_PATH, ENTITY_MODEL_PATH)
+
+ARTIFACT_CHECK_SECONDS = 2   # how often model_version() looks at the model files again
+WARMUP_COMMAND = "Remind me to call Ali tomorrow at 5pm"   # run through newly loaded models before they are swapped in
+
+
+def _load_intent_clf(directory):
+    # the compiled NumPy model (python intent_engine.py) predicts the same labels with far less overhead
+    from intent_engine import COMPILED_INTENT_PATH, load_compiled_intent_classifier
+    intent_path = os.path.join(directory, INTENT_FILE)
+    compiled = load_compiled_intent_classifier(os.path.join(directory, os.path.basename(COMPILED_INTENT_PATH)), intent_path)
+    if compiled is not None:
+        return compiled
+    import joblib
+    return joblib.load(intent_path)
+
+
+def _load_entity_clf(directory):
+    # the packed copy (python entity_model.py) memory-maps its weights, so worker processes share them
+    from entity_model import PACKED_ENTITY_PATH, load_packed_entity_model
+    entity_path = os.path.join(directory, ENTITY_DIR)
+    packed = load_packed_entity_model(os.path.join(directory, os.path.basename(PACKED_ENTITY_PATH)), entity_path)
+    if packed is not None:
+        return packed
+    import spacy
+    return spacy.load(entity_path)
+
+
+LOADERS = {
+    "intent_clf": _load_intent_clf,
+    "entity_clf": _load_entity_clf,
+}
+
+#---------------------------------------------------------
+# registry state
+#---------------------------------------------------------
+_models = {}
+_stats = {}
+_model_dir = None            # directory the loaded models (and _model_version) come from
+_model_version = None
+_fingerprint = None
+_failed_fingerprint = None   # files a swap couldn't load, not retried until they change again
+_checked_at = None
+_prewarm_thread = None
+_swap_thread = None
+_swap_lock = threading.Lock()
+_locks = {name: threading.Lock() for name in LOADERS}
+
+
+def _current_rss():
+    """Resident set size of this process in bytes, or None if it can't be read."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _load(name, directory):
+    rss_before = _current_rss()
+    start = time.perf_counter()
+    model = LOADERS[name](directory)
+    load_seconds = time.perf_counter() - start
+    rss_after = _current_rss()
+
+    rss_delta = None
+    if rss_before is not None and rss_after is not None:
+        rss_delta = rss_after - rss_before
+    print(f"Loaded {name} in {load_seconds:.2f}s")
+    return model, {"load_seconds": round(load_seconds, 4), "rss_bytes": rss_delta}
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def get_model(name):
+    """
+    Returns the shared instance of a model, loading it on first use.
+    Concurrent callers wait for the same load instead of loading twice.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    if name not in LOADERS:
+        raise KeyError(f"Unknown model: {name}")
+
+    if _model_dir is None:
+        model_version()   # picks the active model directory
+    with _locks[name]:
+        model = _models.get(name)
+        if model is None:
+            model, _stats[name] = _load(name, _model_dir)
+            _models[name] = model
+    return model
+
+
+def get_models(*names):
+    """Several models from the same version: a swap can't land in between."""
+    models = _models
+    if all(name in models for name in names):
+        return tuple(models[name] for name in names)
+    return tuple(get_model(name) for name in names)
+
+
+def get_intent_clf():
+    return get_model("intent_clf")
+
+
+def get_entity_clf():
+    return get_model("entity_clf")
+
+
+def prewarm(names=None):
+    """
+    Loads the given models (default: all) in a background thread and returns the thread.
+    Safe to call on every Streamlit rerun: returns the running thread, or None when nothing is left to load.
+    """
+    global _prewarm_thread
+    if _prewarm_thread is not None and _prewarm_thread.is_alive():
+        return _prewarm_thread
+    names = [name for name in (names or LOADERS) if name not in _models]
+    if not names:
+        return None
+
+    def _warm():
+        for name in names:
+            try:
+                get_model(name)
+            except Exception as e:
+                _stats[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(f"❌ Failed to pre-warm {name}:", e)
+
+    _prewarm_thread = threading.Thread(target=_warm, name="model-prewarm", daemon=True)
+    _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def models_ready():
+    """True once every model is loaded (what /ready reports)."""
+    return all(name in _models for name in LOADERS)
+
+
+def model_stats():
+    """Load time (seconds) and resident size added (bytes) for every model loaded so far."""
+    return {
+        name: {"loaded": name in _models, **_stats.get(name, {})}
+        for name in LOADERS
+    }
+
+
+def _artifact_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for file_path in sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+            ):
+                yield path, file_path
+        else:
+            yield path, path
+
+
+def artifact_hash(paths=ARTIFACT_PATHS):
+    """sha256 over the model files (walking directories in a stable order)."""
+    digest = hashlib.sha256()
+    for path, file_path in _artifact_files(paths):
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_fingerprint(paths=ARTIFACT_PATHS):
+    """(file, size, mtime) for every model file: cheap to compare, unlike the full hash."""
+    fingerprint = []
+    for _, file_path in _artifact_files(paths):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        fingerprint.append((file_path, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def model_version():
+    """
+    Short hash of the active model artifacts, stored with every processed task and used in cache keys.
+    Every ARTIFACT_CHECK_SECONDS the active version (models/CURRENT) and its files are checked again.
+    On a change the new models are loaded and warmed up in a background thread while requests keep
+    using the old ones, then models and version are replaced together.
+    """
+    global _checked_at
+    now = time.monotonic()
+    if _model_version is not None and now - _checked_at < ARTIFACT_CHECK_SECONDS:
+        return _model_version
+    _checked_at = now
+
+    directory, fingerprint = _current_files()
+    if fingerprint != _fingerprint and fingerprint != _failed_fingerprint:
+        if _models:
+            _start_swap(directory, fingerprint)
+        else:
+            _install(directory, fingerprint, artifact_hash(artifact_paths(directory))[:12], {}, {})
+    return _model_version
+
+
+def _current_files():
+    directory = version_dir(active_version())
+    return directory, (directory, artifact_fingerprint(artifact_paths(directory)))
+
+
+def _start_swap(directory, fingerprint):
+    global _swap_thread
+    with _swap_lock:
+        if _swap_thread is not None and _swap_thread.is_alive():
+            return
+        _swap_thread = threading.Thread(target=_swap, args=(directory, fingerprint), name="model-swap", daemon=True)
+        _swap_thread.start()
+
+
+def _swap(directory, fingerprint):
+    """Loads and warms up every model in use from directory, then swaps them in."""
+    global _failed_fingerprint
+    print(f"⚠ Model files changed, loading {directory} in the background")
+    start = time.perf_counter()
+    try:
+        version = artifact_hash(artifact_paths(directory))[:12]
+        models, stats = {}, {}
+        for name in LOADERS:
+            if name in _models:
+                models[name], stats[name] = _load(name, directory)
+        _warm_up(models)
+    except Exception as e:
+        _failed_fingerprint = fingerprint
+        print(f"❌ Couldn't load the models in {directory}, still serving {_model_version}:", e)
+        return
+    if _current_files()[1] != fingerprint:
+        return   # changed again while loading (e.g. still being copied), the next check starts over
+    _install(directory, fingerprint, version, models, stats)
+    print(f"✅ Switched to models {version} ({directory}) in {time.perf_counter() - start:.2f}s")
+
+
+def _warm_up(models):
+    # the first call through a freshly loaded model is slow, keep it off the request path
+    if "intent_clf" in models:
+        models["intent_clf"].predict([WARMUP_COMMAND])
+    if "entity_clf" in models:
+        list(models["entity_clf"].pipe([WARMUP_COMMAND]))
+
+
+def _install(directory, fingerprint, version, models, stats):
+    global _models, _stats, _model_dir, _model_version, _fingerprint
+    # with every load lock held, a first load still reading the old files finishes before the switch
+    for lock in _locks.values():
+        lock.acquire()
+    try:
+        _models, _stats = models, stats
+        _model_dir, _model_version, _fingerprint = directory, version, fingerprint
+    finally:
+        for lock in _locks.values():
+            lock.release()
+
+
+#---------------------------------------------------------
+# model versions
+#---------------------------------------------------------
+def active_version():
+    """Version named in models/CURRENT, or None when the models directly in models/ are used."""
+    try:
+        with open(CURRENT_PATH, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def version_dir(version):
+    return os.path.join(VERSIONS_DIR, version) if version else MODELS_DIR
+
+
+def artifact_paths(directory):
+    """(intent pickle, spaCy model) inside a model directory."""
+    return (os.path.join(directory, INTENT_FILE), os.path.join(directory, ENTITY_DIR))
+
+
+def activate_version(version):
+    """
+    Makes a trained version the active one (None: back to the models in models/).
+    CURRENT is replaced with one rename, running processes switch on their next check.
+    """
+    if version is None:
+        if os.path.exists(CURRENT_PATH):
+            os.remove(CURRENT_PATH)
+        return
+    if not os.path.isfile(os.path.join(version_dir(version), MANIFEST_FILE)):
+        raise ValueError(f"Unknown model version: {version}")
+    staging = CURRENT_PATH + ".tmp"
+    with open(staging, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(staging, CURRENT_PATH)
+
+
+def list_versions():
+    """Manifests of the trained versions, oldest first."""
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    manifests = []
+    for name in sorted(os.listdir(VERSIONS_DIR)):
+        if name.startswith("."):
+            continue   # a training run that is still writing
+        try:
+            with open(os.path.join(VERSIONS_DIR, name, MANIFEST_FILE), encoding="utf-8") as f:
+                manifests.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return manifests
+
+
+def version_stats():
+    """Active version, whether a swap is loading and the manifests of every trained version."""
+    return {
+        "active": active_version(),
+        "model_version": model_version(),
+        "directory": _model_dir,
+        "swapping": _swap_thread is not None and _swap_thread.is_alive(),
+        "versions": list_versions(),
+    }
@@ -0,0 +1,184 @@
+#this file answers commands with a fixed shape ("Add X to my list", "Mark X as urgent") with regexes
+#so they skip the intent classifier and spaCy; anything else falls through to the models
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import random
+import re
+import threading
+import time
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+ENABLED = True
+SHADOW_SAMPLE_RATE = 0.02   # share of routed commands also sent through the models to measure agreement
+
+# a task is either quoted ('buy dog food') or plain words, same span the NER model is trained to return
+TASK = r"(?P<quote>['\"]?)(?P<task>[^'\"]+?)(?P=quote)"
+LIST = r"(?:my |the )?(?:to-do list|todo list|task list|list|tasks|plans|agenda|planner)"
+PRIORITY = r"urgent|important|high|low|medium|top"
+
+# an unquoted task with a date or time in it ("submit report by Friday 5pm") is left to the models:
+# the NER model splits it into TASK + DEADLINE, the rules would keep the date inside the task
+MONTHS = r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+WEEKDAYS = r"mon|tues?|wed(?:nes)?|thu(?:rs)?|fri|sat(?:ur)?|sun"
+TIME_OR_DATE = re.compile(
+    rf"\d|\b(?:today|tonight|tomorrow|yesterday|morning|afternoon|evening|night|noon|midnight|weekend|week|month|year"
+    rf"|daily|weekly|monthly|every|{MONTHS}|(?:{WEEKDAYS})(?:day)?s?)\b",
+    re.IGNORECASE,
+)
+
+# (rule name, intent, pattern); patterns must match the whole command
+RULES = [
+    ("add_to_list", "Add Task",
+     rf"(?:please )?(?:add|put) {TASK} (?:to|on|into|in) {LIST}"),
+    ("delete_from_list", "Delete Task",
+     rf"(?:please )?(?:delete|remove) {TASK} from {LIST}"),
+    ("mark_priority", "Set Priority",
+     rf"(?:mark|label|make) {TASK} (?:as )?(?:an? )?(?P<priority>{PRIORITY})(?: priority| task)?"),
+    ("set_deadline", "Set Deadline",
+     rf"set (?:the )?deadline (?:for|of) {TASK} (?:to|as) (?P<deadline>.+)"),
+]
+COMPILED_RULES = [(name, intent, re.compile(pattern, re.IGNORECASE)) for name, intent, pattern in RULES]
+
+ENTITY_GROUPS = {"task": "TASK", "priority": "PRIORITY", "deadline": "DEADLINE"}
+
+
+#---------------------------------------------------------
+# metrics
+#---------------------------------------------------------
+class RouterStats:
+    """Routed vs fall-through counts, agreement with the models on shadowed commands, and time saved."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.routed = {name: 0 for name, _, _ in RULES}
+        self.fallthrough = 0
+        self.router_seconds = 0.0
+        self.model_seconds = 0.0
+        self.model_commands = 0
+        self.shadowed = {name: 0 for name, _, _ in RULES}
+        self.intent_agree = {name: 0 for name, _, _ in RULES}
+        self.entities_agree = {name: 0 for name, _, _ in RULES}
+
+    def record_route(self, rule, seconds):
+        with self.lock:
+            self.router_seconds += seconds
+            if rule is None:
+                self.fallthrough += 1
+            else:
+                self.routed[rule] += 1
+
+    def record_model_time(self, seconds, commands=1):
+        with self.lock:
+            self.model_seconds += seconds
+            self.model_commands += commands
+
+    def record_shadow(self, routed, model_result):
+        rule = routed["rule"]
+        with self.lock:
+            self.shadowed[rule] += 1
+            self.intent_agree[rule] += routed["intent"] == model_result["intent"]
+            self.entities_agree[rule] += routed["entities"] == model_result["entities"]
+
+    def snapshot(self):
+        with self.lock:
+            routed = sum(self.routed.values())
+            total = routed + self.fallthrough
+            shadowed = sum(self.shadowed.values())
+            model_ms = self.model_seconds / self.model_commands * 1000 if self.model_commands else None
+            router_ms = self.router_seconds / total * 1000 if total else None
+            return {
+                "routed": routed,
+                "fallthrough": self.fallthrough,
+                "routed_share": round(routed / total, 4) if total else 0.0,
+                "router_ms_per_command": round(router_ms, 4) if router_ms is not None else None,
+                "model_ms_per_command": round(model_ms, 4) if model_ms is not None else None,
+                # each routed command saves one model call, every command pays for the regexes
+                "saved_seconds": round(routed * model_ms / 1000 - self.router_seconds, 4) if model_ms else None,
+                "shadowed": shadowed,
+                "intent_agreement": round(sum(self.intent_agree.values()) / shadowed, 4) if shadowed else None,
+                "entity_agreement": round(sum(self.entities_agree.values()) / shadowed, 4) if shadowed else None,
+                "rules": {
+                    name: {
+                        "routed": self.routed[name],
+                        "shadowed": self.shadowed[name],
+                        "intent_agree": self.intent_agree[name],
+                        "entities_agree": self.entities_agree[name],
+                    }
+                    for name, _, _ in RULES
+                },
+            }
+
+
+router_stats = RouterStats()
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def match(command):
+    """
+    {"intent", "entities", "rule"} if a rule matches the whole command, else None. No stats are recorded.
+    Unquoted tasks containing a date or time fall through to the models.
+    """
+    text = " ".join(command.split())
+    for name, intent, pattern in COMPILED_RULES:
+        found = pattern.fullmatch(text)
+        if found:
+            if not found.group("quote") and TIME_OR_DATE.search(found.group("task")):
+                return None
+            entities = {
+                label: found.group(group).strip()
+                for group, label in ENTITY_GROUPS.items()
+                if group in pattern.groupindex and found.group(group)
+            }
+            return {"intent": intent, "entities": entities, "rule": name}
+    return None
+
+
+def route(command):
+    """Same as match, but counted in router_stats. Returns None when disabled."""
+    if not ENABLED:
+        return None
+    start = time.perf_counter()
+    routed = match(command)
+    router_stats.record_route(routed and routed["rule"], time.perf_counter() - start)
+    return routed
+
+
+def should_shadow():
+    return random.random() < SHADOW_SAMPLE_RATE
+
+
+def evaluate(commands, classify_with_models):
+    """
+    Offline agreement check: runs the rules and classify_with_models (list of commands -> list of
+    {"intent", "entities"}) over the same commands. Returns coverage and agreement per rule.
+    """
+    routed = [(command, match(command)) for command in commands]
+    hits = [(command, result) for command, result in routed if result is not None]
+    model_results = classify_with_models([command for command, _ in hits]) if hits else []
+
+    report = {name: {"routed": 0, "intent_agree": 0, "entities_agree": 0, "disagreements": []}
+              for name, _, _ in RULES}
+    for (command, result), model_result in zip(hits, model_results):
+        rule = report[result["rule"]]
+        rule["routed"] += 1
+        rule["intent_agree"] += result["intent"] == model_result["intent"]
+        rule["entities_agree"] += result["entities"] == model_result["entities"]
+        if result["intent"] != model_result["intent"] or result["entities"] != model_result["entities"]:
+            rule["disagreements"].append({"command": command, "rules": result, "models": model_result})
+
+    return {
+        "commands": len(commands),
+        "routed": len(hits),
+        "intent_agreement": sum(r["intent_agree"] for r in report.values()) / len(hits) if hits else None,
+        "entity_agreement": sum(r["entities_agree"] for r in report.values()) / len(hits) if hits else None,
+        "rules": report,
+    }
@@ -0,0 +1,256 @@
+#this file scores task priority: smart_reasoning_engine explains one task step by step,
+#score_columns / score_tasks give the same scores for a whole backlog in one NumPy pass
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+from datetime import datetime, timedelta
+from temporal_parser import parse_datetime
+from interval_index import IntervalIndex
+from keyword_matcher import keyword_matcher, first_keyword
+# numpy is only imported by the batch functions, the single-task engine doesn't need it
+
+#---------------------------------------------------------
+# settings (shared by the single-task and the batch scorer)
+#---------------------------------------------------------
+USER_PRIORITY_SCORES = {"low": 20, "medium": 50, "high": 80}
+UNKNOWN_PRIORITY_SCORE = 40        # user gave a priority we don't know, e.g. "urgent"
+DEADLINE_SCORES = [(24, 50, "urgent (<24h)"), (48, 30, "soon (<48h)")]
+DISTANT_DEADLINE = (10, "distant")
+CONFLICT_SCORE = 20
+HIGH_THRESHOLD = 60
+MEDIUM_THRESHOLD = 40
+KEYWORD_SET = "reasoning"          # category set in keywords.json
+
+# user priority codes for the batch scorer: 0 = none given, 4 = given but unknown
+PRIORITY_CODES = {"low": 1, "medium": 2, "high": 3}
+UNKNOWN_PRIORITY_CODE = 4
+FINAL_PRIORITIES = ["low", "medium", "high"]
+
+
+def encode_priority(priority):
+    if not priority:
+        return 0
+    return PRIORITY_CODES.get(priority.lower(), UNKNOWN_PRIORITY_CODE)
+
+
+#---------------------------------------------------------
+# single task
+#---------------------------------------------------------
+def smart_reasoning_engine(intent, entities, calendar_events, event_status=None, duration_minutes=60, now=None):
+    task = entities.get("task", "")
+    user_priority = entities.get("priority")
+    deadline = entities.get("deadline") or entities.get("time")
+    now = now or datetime.now()
+
+    # --- Initialize ---
+    score = 0
+    reasoning_steps = []
+    start_time = None
+
+    # keyword categories and weights live in keywords.json ("reasoning")
+
+    # -------------------------------------------------------
+    # 1️⃣ Direct User Priority
+    # -------------------------------------------------------
+    if user_priority:
+        score += USER_PRIORITY_SCORES.get(user_priority.lower(), UNKNOWN_PRIORITY_SCORE)
+        reasoning_steps.append(f"**Priority:** User specified `{user_priority.upper()}` → score {score}.")
+    else:
+        reasoning_steps.append("**Priority:** No user priority specified, inferring logically...")
+
+    # -------------------------------------------------------
+    # 2️⃣ Deadline / Time Sensitivity
+    # -------------------------------------------------------
+    if deadline:
+        parsed_time = parse_datetime(deadline, reference=now)
+        if parsed_time:
+            start_time = parsed_time
+            hours_until_deadline = (start_time - now).total_seconds() / 3600
+
+            # Deadline-based scoring
+            points, urgency_label = DISTANT_DEADLINE
+            for max_hours, deadline_points, label in DEADLINE_SCORES:
+                if hours_until_deadline <= max_hours:
+                    points, urgency_label = deadline_points, label
+                    break
+            score += points
+            reasoning_steps.append(f"**Deadline:** `{parsed_time}` → {urgency_label}, score {score}.")
+
+    # -------------------------------------------------------
+    # 3️⃣ Keyword-Based Importance
+    # -------------------------------------------------------
+    if task:
+        category, weight = first_keyword(task, KEYWORD_SET)
+        if category:
+            score += weight
+            reasoning_steps.append(f"**Keyword:** Task mentions `{category}` → +{weight} points, score {score}.")
+
+    # -------------------------------------------------------
+    # 4️⃣ Calendar Conflict Detection
+    # -------------------------------------------------------
+    conflict_detected = False
+    if start_time and calendar_events:
+        end_time = start_time + timedelta(minutes=duration_minutes)
+        if not isinstance(calendar_events, IntervalIndex):
+            calendar_events = IntervalIndex(calendar_events)
+        overlapping = calendar_events.overlapping(start_time, end_time)
+        if overlapping:
+            score += CONFLICT_SCORE
+            conflict_detected = True
+            reasoning_steps.append(f"**Conflict:** Overlaps with `{overlapping[0]['title']}` → urgency increased, score {score}.")
+
+    # -------------------------------------------------------
+    # 5️⃣ Compute Final Priority
+    # -------------------------------------------------------
+    if score >= HIGH_THRESHOLD:
+        final_priority = "high"
+    elif score >= MEDIUM_THRESHOLD:
+        final_priority = "medium"
+    else:
+        final_priority = "low"
+
+    reasoning_steps.append(f"**Final Decision:** `{final_priority.upper()}` priority (score: {score}).")
+
+    # -------------------------------------------------------
+    # 6️⃣ Reflect Actual Calendar Action
+    # -------------------------------------------------------
+    schedule_on_calendar = (
+        intent in ["Add Task", "Set Priority", "Set Deadline"]
+        and final_priority in ["high", "medium"]
+    )
+
+    # Reflect backend status if provided
+    if event_status and event_status.get("success"):
+        reasoning_steps.append("**Action:** Task successfully added to Google Calendar ✅")
+    elif schedule_on_calendar:
+        reasoning_steps.append("**Action:** Task will be added to Google Calendar.")
+    else:
+        reasoning_steps.append("**Action:** Task not added to calendar automatically.")
+
+    # --- Format reasoning for Streamlit ---
+    formatted_reasoning = "\n".join([f"- {step}" for step in reasoning_steps])
+
+    return {
+        "task": task,
+        "final_priority": final_priority,
+        "reasoning": formatted_reasoning,
+        "schedule_on_calendar": schedule_on_calendar,
+        "score": score
+    }
+
+
+#---------------------------------------------------------
+# batch scoring
+#---------------------------------------------------------
+def keyword_weights():
+    """Weight of every keyword category, in the order of the keyword_flags columns."""
+    categories = keyword_matcher.keyword_sets[KEYWORD_SET]
+    return [categories[name].get("weight", 0) for name in keyword_matcher.order[KEYWORD_SET]]
+
+
+def keyword_flag_rows(texts):
+    """(n, categories) booleans: which keyword categories each text mentions, in keywords.json order."""
+    import numpy as np
+
+    categories = keyword_matcher.order[KEYWORD_SET]
+    flags = np.zeros((len(texts), len(categories)), dtype=bool)
+    for i, text in enumerate(texts):
+        found = keyword_matcher.matches(text).get(KEYWORD_SET) if text else None
+        if found:
+            flags[i] = [category in found for category in categories]
+    return flags
+
+
+def score_columns(deadline_ts, priority_codes, keyword_flags, conflict_flags, now_ts):
+    """
+    Scores many tasks at once, same rules as smart_reasoning_engine.
+    deadline_ts:    unix timestamps, NaN when there is no (parseable) deadline
+    priority_codes: encode_priority() of the user priority
+    keyword_flags:  (n, categories) booleans, columns in keywords.json order; the first True one counts
+    conflict_flags: True when the task overlaps a calendar event (only counted with a deadline)
+    Returns (scores, final priorities) as NumPy arrays.
+    """
+    import numpy as np
+
+    code_scores = np.array([0, USER_PRIORITY_SCORES["low"], USER_PRIORITY_SCORES["medium"],
+                            USER_PRIORITY_SCORES["high"], UNKNOWN_PRIORITY_SCORE])
+    deadline_ts = np.asarray(deadline_ts, dtype=np.float64)
+    keyword_flags = np.asarray(keyword_flags, dtype=bool).reshape(len(deadline_ts), -1)
+
+    scores = code_scores[np.asarray(priority_codes, dtype=np.intp)]
+
+    has_deadline = ~np.isnan(deadline_ts)
+    hours = (deadline_ts - now_ts) / 3600
+    points = np.full(len(deadline_ts), DISTANT_DEADLINE[0])
+    # later thresholds first, so the tightest one that applies wins
+    for max_hours, deadline_points, _ in reversed(DEADLINE_SCORES):
+        points = np.where(hours <= max_hours, deadline_points, points)
+    scores = scores + np.where(has_deadline, points, 0)
+
+    if keyword_flags.shape[1]:
+        weights = np.array(keyword_weights())
+        scores = scores + np.where(keyword_flags.any(axis=1), weights[keyword_flags.argmax(axis=1)], 0)
+
+    scores = scores + np.where(has_deadline & np.asarray(conflict_flags, dtype=bool), CONFLICT_SCORE, 0)
+
+    levels = (scores >= MEDIUM_THRESHOLD).astype(np.intp) + (scores >= HIGH_THRESHOLD)
+    return scores, np.array(FINAL_PRIORITIES)[levels]
+
+
+def task_columns(tasks, calendar_events=None, now=None, duration_minutes=60):
+    """
+    Columnar inputs for score_columns from entity dicts (the keys smart_reasoning_engine reads:
+    task, priority, deadline / time). calendar_events may be an IntervalIndex or a list of events.
+    """
+    import numpy as np
+
+    now = now or datetime.now()
+    index = None
+    if calendar_events:
+        index = calendar_events if isinstance(calendar_events, IntervalIndex) else IntervalIndex(calendar_events)
+    duration = timedelta(minutes=duration_minutes)
+
+    n = len(tasks)
+    deadline_ts = np.full(n, np.nan)
+    priority_codes = np.zeros(n, dtype=np.int8)
+    conflict_flags = np.zeros(n, dtype=bool)
+
+    for i, entities in enumerate(tasks):
+        priority_codes[i] = encode_priority(entities.get("priority"))
+
+        deadline = entities.get("deadline") or entities.get("time")
+        parsed = parse_datetime(deadline, reference=now) if deadline else None
+        if parsed:
+            deadline_ts[i] = parsed.timestamp()
+            if index is not None:
+                conflict_flags[i] = index.overlaps_any(parsed, parsed + duration)
+
+    return {
+        "deadline_ts": deadline_ts,
+        "priority_codes": priority_codes,
+        "keyword_flags": keyword_flag_rows([entities.get("task", "") for entities in tasks]),
+        "conflict_flags": conflict_flags,
+        "now_ts": now.timestamp(),
+    }
+
+
+def score_tasks(tasks, calendar_events=None, now=None, explain=(), intents=None, duration_minutes=60):
+    """
+    Batch version of smart_reasoning_engine for a list of entity dicts.
+    Returns {"score": array, "final_priority": array, "reasoning": {i: text}}, where reasoning is
+    only built for the indices in explain (intents[i] is used for their calendar action line).
+    """
+    now = now or datetime.now()
+    if calendar_events and not isinstance(calendar_events, IntervalIndex):
+        calendar_events = IntervalIndex(calendar_events)
+    columns = task_columns(tasks, calendar_events, now=now, duration_minutes=duration_minutes)
+    scores, final_priorities = score_columns(**columns)
+
+    reasoning = {}
+    for i in explain:
+        intent = intents[i] if intents is not None else None
+        reasoning[i] = smart_reasoning_engine(
+            intent, tasks[i], calendar_events, duration_minutes=duration_minutes, now=now
+        )["reasoning"]
+    return {"score": scores, "final_priority": final_priorities, "reasoning": reasoning}
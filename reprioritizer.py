@@ -0,0 +1,189 @@
+#this file raises stored priority scores as deadlines get closer
+#a min-heap holds the next time each task crosses a scoring boundary (48h / 24h before its deadline),
+#so the worker sleeps until the earliest crossing and only touches the tasks that crossed
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import heapq
+import threading
+import time
+from task_db import task_db, deadline_band
+from priority_scorer import DEADLINE_SCORES, DISTANT_DEADLINE
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+BOUNDARY_HOURS = sorted({hours for hours, _, _ in DEADLINE_SCORES}, reverse=True)   # [48, 24]
+BAND_POINTS = {hours: points for hours, points, _ in DEADLINE_SCORES}               # {24: 50, 48: 30}
+MAX_SLEEP_SECONDS = 3600   # wake at least hourly in case the wall clock jumped
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def crossings(deadline_ts, now):
+    """Future times at which a task with this deadline moves into a closer scoring band."""
+    return [deadline_ts - hours * 3600 for hours in BOUNDARY_HOURS if deadline_ts - hours * 3600 > now]
+
+
+def band_points(band):
+    return BAND_POINTS[band] if band is not None else DISTANT_DEADLINE[0]
+
+
+def rescore(rows, now):
+    """
+    Stored scores come from different formulas (process_task, the batch endpoint, imports), so they aren't
+    recomputed: a row that moved into a closer deadline band than the one its score counts (deadline_band)
+    gets the difference in deadline points added. Scores are never lowered.
+    Returns [(score, band, id)] for the rows that moved.
+    """
+    changes = []
+    for row in rows:
+        band = deadline_band(row["deadline_ts"], now)
+        counted = row["deadline_band"]
+        if band is None or (counted is not None and band >= counted):
+            continue
+        raise_by = max(0, band_points(band) - band_points(counted))
+        changes.append(((row["priority_score"] or 0) + raise_by, band, row["id"]))
+    return changes
+
+
+#---------------------------------------------------------
+# worker
+#---------------------------------------------------------
+class Reprioritizer:
+    """
+    Background thread that raises task scores when they cross a deadline boundary.
+    New or edited tasks are handed over with track(ids); heap entries for a task whose deadline
+    changed since are skipped when they come up.
+    """
+
+    def __init__(self, db=task_db, clock=time.time):
+        self.db = db
+        self.clock = clock
+        self.heap = []            # (crossing time, task id, deadline_ts it was computed for)
+        self.pending = []         # ids passed to track(), loaded by the worker thread
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+        self.updated = 0
+        self.wakeups = 0
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return self.thread
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="reprioritizer", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def track(self, task_ids):
+        """Schedules the crossings of new / edited tasks; the rows are read by the worker, not the caller."""
+        task_ids = [task_id for task_id in task_ids if task_id is not None]
+        if not task_ids:
+            return
+        with self.condition:
+            self.pending.extend(task_ids)
+            self.condition.notify()
+
+    def _push(self, rows, now):
+        for row in rows:
+            if row["deadline_ts"] is None:
+                continue
+            for crossing in crossings(row["deadline_ts"], now):
+                heapq.heappush(self.heap, (crossing, row["id"], row["deadline_ts"]))
+
+    def _load(self):
+        """
+        Initial heap, and a catch-up pass for upcoming tasks whose boundary passed while we weren't running.
+        Rows already raised for their band are left alone, so restarts don't raise anything twice.
+        """
+        now = self.clock()
+        rows = self.db.scoring_rows(deadline_from=now)
+        horizon = now + BOUNDARY_HOURS[0] * 3600
+        self._update([row for row in rows if row["deadline_ts"] <= horizon], now)
+        with self.condition:
+            self._push(rows, now)
+
+    def _update(self, rows, now):
+        changes = rescore(rows, now)
+        if changes:
+            self.db.update_priority_scores(changes)
+            self.updated += len(changes)
+            print(f"✅ Re-prioritized {len(changes)} tasks")
+
+    def _next_batch(self):
+        """Blocks until a crossing is due or tasks were tracked. Returns (due entries, tracked ids) or None to stop."""
+        with self.condition:
+            while not self.stopped:
+                now = self.clock()
+                if self.pending or (self.heap and self.heap[0][0] <= now):
+                    due = []
+                    while self.heap and self.heap[0][0] <= now:
+                        due.append(heapq.heappop(self.heap))
+                    tracked, self.pending = self.pending, []
+                    return due, tracked
+                timeout = self.heap[0][0] - now if self.heap else MAX_SLEEP_SECONDS
+                self.condition.wait(min(timeout, MAX_SLEEP_SECONDS))
+            return None
+
+    def _run(self):
+        try:
+            self._load()
+        except Exception as e:
+            print("❌ Re-prioritizer failed to load tasks:", e)
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            due, tracked = batch
+            try:
+                self._handle(due, tracked)
+            except Exception as e:
+                print("❌ Re-prioritization failed:", e)
+
+    def _handle(self, due, tracked):
+        now = self.clock()
+        if due:
+            self.wakeups += 1
+            expected = {task_id: deadline_ts for _, task_id, deadline_ts in due}
+            rows = self.db.scoring_rows(task_ids=list(expected))
+            # a task whose deadline was edited has fresh heap entries from track()
+            self._update([row for row in rows if row["deadline_ts"] == expected[row["id"]]], now)
+        if tracked:
+            rows = self.db.scoring_rows(task_ids=tracked)
+            with self.condition:
+                self._push(rows, now)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "running": self.thread is not None and self.thread.is_alive(),
+                "scheduled_crossings": len(self.heap),
+                "next_crossing": self.heap[0][0] if self.heap else None,
+                "wakeups": self.wakeups,
+                "updated": self.updated,
+            }
+
+
+# shared instance started by app.py
+reprioritizer = Reprioritizer()
+
+
+#---------------------------------------------------------
+# standalone: python reprioritizer.py
+#---------------------------------------------------------
+if __name__ == "__main__":
+    print("Re-prioritizer running, Ctrl+C to stop")
+    thread = reprioritizer.start()
+    try:
+        while thread.is_alive():
+            thread.join(1)
+    except KeyboardInterrupt:
+        reprioritizer.stop()
@@ -0,0 +1,165 @@
+#this file keeps a local copy of the Google Calendar schedule so we don't fetch the whole week on every task
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import threading
+import time
+from datetime import datetime, timedelta
+from interval_index import IntervalIndex, to_utc
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+CACHE_TTL_SECONDS = 60     # how long a synced snapshot is trusted before syncing again
+SYNC_LOOKBEHIND_DAYS = 1   # the first full sync starts this far in the past
+PAGE_SIZE = 250
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def event_to_schedule_item(event):
+    """
+    Converts a Calendar API event into {"id", "title", "start", "end"} with timezone-aware datetimes.
+    Returns None for all-day events (they have no dateTime).
+    """
+    start = event.get('start', {}).get('dateTime')
+    end = event.get('end', {}).get('dateTime')
+    if not (start and end):
+        return None
+    return {
+        "id": event.get('id'),
+        "title": event.get('summary', ''),
+        "start": datetime.fromisoformat(start.replace("Z", "+00:00")),
+        "end": datetime.fromisoformat(end.replace("Z", "+00:00"))
+    }
+
+
+def _utc_timestamp(dt):
+    return to_utc(dt).timestamp()
+
+
+def _is_gone(error):
+    """True for the 410 the API returns when a sync token has expired."""
+    resp = getattr(error, 'resp', None)
+    return getattr(resp, 'status', None) == 410
+
+
+#---------------------------------------------------------
+# schedule cache
+#---------------------------------------------------------
+class ScheduleCache:
+    """
+    Events keyed by event id, refreshed with syncToken incremental sync.
+    Window queries are answered from memory while the snapshot is younger than the TTL.
+    """
+
+    def __init__(self, calendar_id='primary', ttl_seconds=CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.calendar_id = calendar_id
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.events = {}
+        self.sync_token = None
+        self.last_sync = None
+        self.index = None
+        self.lock = threading.Lock()
+
+    def is_fresh(self):
+        return self.last_sync is not None and self.clock() - self.last_sync < self.ttl_seconds
+
+    def invalidate(self):
+        """Marks the snapshot stale; the next query does an incremental sync."""
+        self.last_sync = None
+
+    def reset(self):
+        """Drops every cached event and the sync token; the next query does a full sync."""
+        with self.lock:
+            self.events = {}
+            self.sync_token = None
+            self.last_sync = None
+            self.index = None
+
+    def refresh(self, service, force=False):
+        with self.lock:
+            if force or not self.is_fresh():
+                self._sync(service)
+
+    def _sync(self, service):
+        try:
+            self._sync_pages(service)
+        except Exception as e:
+            if not (self.sync_token and _is_gone(e)):
+                raise
+            # sync token expired, start over with a full sync
+            print("⚠ Calendar sync token expired, doing a full sync")
+            self.sync_token = None
+            self._sync_pages(service)
+        self.last_sync = self.clock()
+
+    def _sync_pages(self, service):
+        params = {"calendarId": self.calendar_id, "singleEvents": True, "maxResults": PAGE_SIZE}
+        if self.sync_token:
+            params["syncToken"] = self.sync_token
+            events = dict(self.events)
+        else:
+            time_min = datetime.utcnow() - timedelta(days=SYNC_LOOKBEHIND_DAYS)
+            params["timeMin"] = time_min.isoformat() + 'Z'
+            events = {}
+
+        while True:
+            result = service.events().list(**params).execute()
+            for event in result.get('items', []):
+                item = None if event.get('status') == 'cancelled' else event_to_schedule_item(event)
+                if item is None:
+                    events.pop(event.get('id'), None)
+                else:
+                    events[item["id"]] = item
+
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+            params["pageToken"] = page_token
+
+        # only swap in the new state once every page has been read
+        if events != self.events:
+            self.index = None
+        self.events = events
+        self.sync_token = result.get('nextSyncToken')
+
+    def get_schedule(self, service, lookahead_days=7, start=None):
+        """
+        Same result as get_existing_schedule: events overlapping [start, start + lookahead_days),
+        sorted by start time. start defaults to now.
+        """
+        self.refresh(service)
+
+        window_start = _utc_timestamp(start) if start else time.time()
+        window_end = window_start + lookahead_days * 86400
+
+        schedule = [
+            item for item in self.events.values()
+            if _utc_timestamp(item["end"]) > window_start and _utc_timestamp(item["start"]) < window_end
+        ]
+        schedule.sort(key=lambda item: _utc_timestamp(item["start"]))
+        return schedule
+
+    def get_index(self, service):
+        """IntervalIndex over every cached event, rebuilt only when a sync changes the snapshot."""
+        self.refresh(service)
+        with self.lock:
+            if self.index is None:
+                self.index = IntervalIndex(self.events.values())
+            return self.index
+
+
+# shared instance used by the API and the frontends
+schedule_cache = ScheduleCache()
+
+
+def get_cached_schedule(service, lookahead_days=7):
+    return schedule_cache.get_schedule(service, lookahead_days=lookahead_days)
+
+
+def get_cached_index(service):
+    return schedule_cache.get_index(service)
@@ -0,0 +1,152 @@
+#this file finds free calendar slots and places tasks so they don't get booked on top of existing events
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from interval_index import IntervalIndex, LOCAL_TZ, to_utc
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+WORK_START_HOUR = 9      # earliest local hour a task may start
+WORK_END_HOUR = 21       # tasks must finish by this local hour
+HORIZON_DAYS = 7         # same window as the cached schedule
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def _off_hours(first_day, days, work_start_hour, work_end_hour, working_days):
+    """UTC intervals outside local working hours for `days` days starting at local date first_day."""
+    day = datetime(first_day.year, first_day.month, first_day.day)
+    blocked = []
+    for _ in range(days + 1):
+        day_start = LOCAL_TZ.localize(day)
+        next_day = LOCAL_TZ.localize(day + timedelta(days=1))
+        if working_days is not None and day.weekday() not in working_days:
+            blocked.append((to_utc(day_start), to_utc(next_day)))
+        else:
+            blocked.append((to_utc(day_start), to_utc(LOCAL_TZ.localize(day + timedelta(hours=work_start_hour)))))
+            blocked.append((to_utc(LOCAL_TZ.localize(day + timedelta(hours=work_end_hour))), to_utc(next_day)))
+        day += timedelta(days=1)
+    return blocked
+
+
+class BusyTimeline:
+    """
+    Sorted, disjoint busy intervals in UTC: calendar events plus time outside working hours
+    (unless off_hours is False). Placed tasks are merged in as we go, so back-to-back bookings
+    are skipped in one step.
+    """
+
+    def __init__(self, index, earliest, work_start_hour=WORK_START_HOUR, work_end_hour=WORK_END_HOUR,
+                 working_days=None, horizon_days=HORIZON_DAYS, off_hours=True):
+        first_day = to_utc(earliest).astimezone(LOCAL_TZ)
+        intervals = list(zip(index.busy_starts, index.busy_ends))
+        if off_hours:
+            intervals += _off_hours(first_day, horizon_days, work_start_hour, work_end_hour, working_days)
+        intervals.sort()
+
+        self.starts = []
+        self.ends = []
+        for start, end in intervals:
+            if self.ends and start <= self.ends[-1]:
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+        self.limit = to_utc(earliest) + timedelta(days=horizon_days)
+
+    def first_conflict_end(self, start, end):
+        """End of the first busy interval overlapping [start, end), or None if the range is free."""
+        j = bisect_right(self.ends, start)
+        if j < len(self.starts) and self.starts[j] < end:
+            return self.ends[j]
+        return None
+
+    def add(self, start, end):
+        # merge with every interval it overlaps or touches, so the lists stay disjoint and sorted
+        i = bisect_left(self.ends, start)
+        j = bisect_right(self.starts, end)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def find_slot(self, earliest, duration_minutes):
+        """Earliest free UTC start at or after `earliest`, or None if nothing fits before the horizon."""
+        duration = timedelta(minutes=duration_minutes)
+        candidate = to_utc(earliest)
+        while candidate + duration <= self.limit:
+            busy_until = self.first_conflict_end(candidate, candidate + duration)
+            if busy_until is None:
+                return candidate
+            candidate = busy_until
+        return None
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def find_free_slot(schedule, earliest=None, duration_minutes=60, **constraints):
+    """
+    Returns the earliest local datetime >= earliest where the task fits inside working hours
+    without overlapping anything in schedule (an IntervalIndex or a list of events).
+    Returns None when no slot exists within the horizon.
+    constraints: work_start_hour, work_end_hour, working_days (weekday numbers), horizon_days.
+    """
+    index = schedule if isinstance(schedule, IntervalIndex) else IntervalIndex(schedule)
+    earliest = earliest or datetime.now()
+    start = BusyTimeline(index, earliest, **constraints).find_slot(earliest, duration_minutes)
+    return start.astimezone(LOCAL_TZ) if start else None
+
+
+def schedule_batch(tasks, schedule, now=None, keep_free_starts=False, **constraints):
+    """
+    Places many tasks greedily, highest priority score first, in one pass over the busy intervals.
+    Each task is a dict with "score" and optionally "start_time" (preferred start) and "duration_minutes".
+    With keep_free_starts a task keeps its preferred start, even outside working hours, unless it overlaps
+    an event or a task placed before it (as prepare_calendar_task does for one task).
+    Returns one result per task, in input order:
+    {"task": task, "start": datetime or None, "end": datetime or None, "rescheduled": bool}
+    """
+    if not tasks:
+        return []
+    index = schedule if isinstance(schedule, IntervalIndex) else IntervalIndex(schedule)
+    now = to_utc(now or datetime.now())
+
+    preferred = [to_utc(task.get("start_time") or now) for task in tasks]
+    order = sorted(range(len(tasks)), key=lambda i: (-tasks[i].get("score", 0), preferred[i]))
+    timeline = BusyTimeline(index, min(preferred), **constraints)
+    # events and placed tasks only, to tell a real conflict from a start outside working hours
+    booked = BusyTimeline(index, min(preferred), off_hours=False, **constraints) if keep_free_starts else None
+
+    results = [None] * len(tasks)
+    for i in order:
+        task = tasks[i]
+        duration_minutes = task.get("duration_minutes", 60)
+        duration = timedelta(minutes=duration_minutes)
+        if booked is not None and booked.first_conflict_end(preferred[i], preferred[i] + duration) is None:
+            start = preferred[i]
+        else:
+            start = timeline.find_slot(preferred[i], duration_minutes)
+
+        if start is None:
+            results[i] = {"task": task, "start": None, "end": None, "rescheduled": False}
+            continue
+
+        end = start + duration
+        timeline.add(start, end)
+        if booked is not None:
+            booked.add(start, end)
+        results[i] = {
+            "task": task,
+            "start": start.astimezone(LOCAL_TZ),
+            "end": end.astimezone(LOCAL_TZ),
+            "rescheduled": start != preferred[i]
+        }
+    return results
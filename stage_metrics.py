@@ -0,0 +1,206 @@
+#this file times the pipeline stages (intent, NER, dateparser, calendar calls, ...) into fixed-bucket histograms
+#and renders them for /metrics (Prometheus text format) and /stage_stats/ (p50 / p95 / p99 as JSON)
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+# histogram upper bounds in seconds, 1-2.5-5 steps from 10µs to 50s (anything slower goes to +Inf)
+BUCKETS = tuple(
+    round(base * scale, 6)
+    for scale in (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1, 10)
+    for base in (1, 2.5, 5)
+)
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "task_stage"
+
+# per-request timings, only collected while a request has called start_request_timings()
+_request_timings = ContextVar("stage_timings", default=None)
+
+
+#---------------------------------------------------------
+# histograms
+#---------------------------------------------------------
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "errors")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class StageMetrics:
+    """Count, error count, sum and bucket counts of the durations recorded per stage name."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds, error=False):
+        position = bisect_left(self.buckets, seconds)
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[position] += 1
+            histogram.total += seconds
+            histogram.count += 1
+            if error:
+                histogram.errors += 1
+
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def quantile(self, counts, count, q):
+        """Estimate from the bucket counts, interpolating inside the bucket (like histogram_quantile)."""
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for position, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if position == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[position - 1] if position else 0.0
+                upper = self.buckets[position]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def _copy(self):
+        with self.lock:
+            return {
+                stage: (list(h.counts), h.total, h.count, h.errors)
+                for stage, h in sorted(self.stages.items())
+            }
+
+    def snapshot(self):
+        """{stage: {"count", "errors", "error_rate", "mean_ms", "p50_ms", "p95_ms", "p99_ms"}}"""
+        result = {}
+        for stage, (counts, total, count, errors) in self._copy().items():
+            stats = {
+                "count": count,
+                "errors": errors,
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "mean_ms": round(total / count * 1000, 3) if count else None,
+            }
+            for q in QUANTILES:
+                value = self.quantile(counts, count, q)
+                stats[f"p{int(q * 100)}_ms"] = round(value * 1000, 3) if value is not None else None
+            result[stage] = stats
+        return result
+
+    def prometheus(self):
+        """Every stage in Prometheus text exposition format (version 0.0.4)."""
+        name = f"{METRIC_PREFIX}_duration_seconds"
+        stages = self._copy()
+        lines = [
+            f"# HELP {name} Time spent in each pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, (counts, total, count, _) in stages.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        quantiles = f"{METRIC_PREFIX}_duration_quantile_seconds"
+        lines += [
+            f"# HELP {quantiles} p50 / p95 / p99 of each stage, estimated from the histogram buckets.",
+            f"# TYPE {quantiles} gauge",
+        ]
+        for stage, (counts, _, count, _) in stages.items():
+            for q in QUANTILES:
+                value = self.quantile(counts, count, q)
+                if value is not None:
+                    lines.append(f'{quantiles}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+
+        errors = f"{METRIC_PREFIX}_errors_total"
+        lines += [
+            f"# HELP {errors} Stage calls that raised or reported a failure.",
+            f"# TYPE {errors} counter",
+        ]
+        for stage, (_, _, _, error_count) in stages.items():
+            lines.append(f'{errors}{{stage="{stage}"}} {error_count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+
+
+# shared instance for the whole process
+stage_metrics = StageMetrics()
+
+
+#---------------------------------------------------------
+# timing a stage
+#---------------------------------------------------------
+class StageTimer:
+    """
+    with timed("ner"): ...  records the block's duration under "ner".
+    An exception counts as an error; call fail() for failures that are returned instead of raised.
+    """
+    __slots__ = ("stage", "start", "error")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.error = False
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_metrics.observe(self.stage, perf_counter() - self.start, self.error or exc_type is not None)
+        return False
+
+    def fail(self):
+        self.error = True
+
+
+def timed(stage):
+    return StageTimer(stage)
+
+
+#---------------------------------------------------------
+# per-request timings (X-Stage-Timings)
+#---------------------------------------------------------
+def start_request_timings():
+    """
+    Starts collecting the stages run by the current request (and the executor threads it hands work to,
+    see app.run_stage). Returns (timings dict, token for stop_request_timings).
+    """
+    timings = {}
+    return timings, _request_timings.set(timings)
+
+
+def stop_request_timings(token):
+    _request_timings.reset(token)
+
+
+def format_timings(timings):
+    """'intent=0.412ms, ner=3.020ms' in the order the stages finished."""
+    return ", ".join(f"{stage}={seconds * 1000:.3f}ms" for stage, seconds in timings.items())
+
+
+def stage_stats():
+    return stage_metrics.snapshot()
+
+
+def metrics_text():
+    return stage_metrics.prometheus()
@@ -0,0 +1,488 @@
+#this file is the data-access layer for the tasks table: one pooled connection per thread, WAL mode, cached statements
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+DB_NAME = "tasks.db"
+STATEMENT_CACHE_SIZE = 128
+BUSY_TIMEOUT_MS = 5000
+
+MAX_PAGE_SIZE = 1000
+INSERT_CHUNK_SIZE = 5000   # rows per transaction for bulk imports
+
+COLUMNS = ["task", "deadline", "priority", "location", "recurrence", "duration", "intent",
+           "deadline_ts", "priority_score",
+           "command", "start_ts", "event_id", "event_link", "model_version", "latency_ms", "deadline_band"]
+DEADLINE_TS_POSITION = COLUMNS.index("deadline_ts")
+PRIORITY_SCORE_POSITION = COLUMNS.index("priority_score")
+DEADLINE_BAND_POSITION = COLUMNS.index("deadline_band")
+
+# same mapping process_task uses for an explicit priority
+PRIORITY_SCORES = {"low": 20, "medium": 50, "high": 80}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT,
+    deadline TEXT,
+    priority TEXT,
+    location TEXT,
+    recurrence TEXT,
+    duration TEXT,
+    intent TEXT,
+    deadline_ts REAL,
+    priority_score INTEGER,
+    command TEXT,
+    start_ts REAL,
+    event_id TEXT,
+    event_link TEXT,
+    model_version TEXT,
+    latency_ms REAL,
+    deadline_band INTEGER
+)
+"""
+
+# columns added after the first release, added to older databases on startup
+MIGRATIONS = {
+    "deadline_ts": "ALTER TABLE tasks ADD COLUMN deadline_ts REAL",
+    "priority_score": "ALTER TABLE tasks ADD COLUMN priority_score INTEGER",
+    "command": "ALTER TABLE tasks ADD COLUMN command TEXT",
+    "start_ts": "ALTER TABLE tasks ADD COLUMN start_ts REAL",
+    "event_id": "ALTER TABLE tasks ADD COLUMN event_id TEXT",
+    "event_link": "ALTER TABLE tasks ADD COLUMN event_link TEXT",
+    "model_version": "ALTER TABLE tasks ADD COLUMN model_version TEXT",
+    "latency_ms": "ALTER TABLE tasks ADD COLUMN latency_ms REAL",
+    "deadline_band": "ALTER TABLE tasks ADD COLUMN deadline_band INTEGER",
+}
+
+# tasks without a deadline sort last
+DEADLINE_KEY = "IFNULL(deadline_ts, 9e15)"
+
+INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks ({DEADLINE_KEY}, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_priority_score ON tasks (priority_score DESC, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_intent ON tasks (intent, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_event_id ON tasks (event_id) WHERE event_id IS NOT NULL",
+]
+
+# sort name -> (key expression, direction)
+SORTS = {
+    "id": ("id", "ASC"),
+    "priority_score": ("priority_score", "DESC"),
+    "deadline": (DEADLINE_KEY, "ASC"),
+}
+
+INSERT_SQL = f"INSERT INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def deadline_timestamp(deadline):
+    """Unix timestamp for a deadline string like 'tomorrow 5pm', or None."""
+    if not deadline:
+        return None
+    from temporal_parser import parse_datetime
+    parsed = parse_datetime(deadline)
+    return parsed.timestamp() if parsed else None
+
+
+def deadline_band(deadline_ts, now=None):
+    """
+    Closest deadline boundary (48 or 24 hours before the deadline, see priority_scorer.DEADLINE_SCORES)
+    the task is inside at now, or None. Stored with the task: the band its priority_score already counts.
+    """
+    if deadline_ts is None:
+        return None
+    from priority_scorer import DEADLINE_SCORES
+    hours_left = (deadline_ts - (time.time() if now is None else now)) / 3600
+    inside = [hours for hours, _, _ in DEADLINE_SCORES if hours_left <= hours]
+    return min(inside) if inside else None
+
+
+def priority_score_for(priority):
+    return PRIORITY_SCORES.get(priority.lower(), 40) if priority else 0
+
+
+def priority_level(priority, score):
+    """high / medium / low for a stored task, falling back to the score when the label is something else."""
+    if priority and priority.lower() in PRIORITY_SCORES:
+        return priority.lower()
+    score = score or 0
+    if score >= 70:
+        return "high"
+    elif score >= 40:
+        return "medium"
+    return "low"
+
+
+def normalized_row(task, deadline_cache=None):
+    """
+    Column values (in COLUMNS order) for a task, filling deadline_ts, priority_score and deadline_band when missing.
+    deadline_cache (a dict) lets one import parse each distinct deadline string once.
+    """
+    # hot path for bulk imports, so no intermediate dict
+    get = task.get
+    values = list(map(get, COLUMNS))
+    deadline_ts = values[DEADLINE_TS_POSITION]
+    if deadline_ts is None:
+        deadline = get("deadline")
+        if deadline_cache is None:
+            deadline_ts = deadline_timestamp(deadline)
+        elif deadline in deadline_cache:
+            deadline_ts = deadline_cache[deadline]
+        else:
+            deadline_ts = deadline_cache[deadline] = deadline_timestamp(deadline)
+    values[DEADLINE_TS_POSITION] = deadline_ts
+    if values[PRIORITY_SCORE_POSITION] is None:
+        values[PRIORITY_SCORE_POSITION] = priority_score_for(get("priority"))
+    if values[DEADLINE_BAND_POSITION] is None:
+        values[DEADLINE_BAND_POSITION] = deadline_band(deadline_ts)
+    return values
+
+
+def build_queries(priority=None, intent=None, deadline_from=None, deadline_to=None,
+                  sort="id", after_id=None, after_key=None, limit=None):
+    """
+    SELECTs for one keyset page, as a list of (sql, params) run one after another.
+    deadline_from / deadline_to are unix timestamps.
+    after_key is the sort value of the after_id row (not needed when sorting by id).
+    After a row with ties on the sort key there are two: the rest of its tie (key = ? AND id > ?),
+    then the rows past it (key > ?). Each is a single index range; sqlite only seeks a row-value
+    comparison like (key, id) > (?, ?) on its first column and would scan the whole tie.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    key, direction = SORTS[sort]
+
+    where = []
+    params = []
+    if priority is not None:
+        where.append("priority = ?")
+        params.append(priority)
+    if intent is not None:
+        where.append("intent = ?")
+        params.append(intent)
+    # the indexed expression, not deadline_ts, so a range can use idx_tasks_deadline
+    if deadline_from is not None:
+        where.append(f"{DEADLINE_KEY} >= ?")
+        params.append(deadline_from)
+    if deadline_to is not None:
+        where.append(f"{DEADLINE_KEY} < ?")
+        params.append(deadline_to)
+    elif deadline_from is not None:
+        where.append(f"{DEADLINE_KEY} < 9e15")
+
+    if after_id is None:
+        parts = [([], [], f"{key} {direction}, id ASC" if sort != "id" else "id ASC")]
+    elif sort == "id":
+        parts = [(["id > ?"], [after_id], "id ASC")]
+    else:
+        op = "<" if direction == "DESC" else ">"
+        parts = [
+            ([f"{key} = ?", "id > ?"], [after_key, after_id], "id ASC"),
+            ([f"{key} {op} ?"], [after_key], f"{key} {direction}, id ASC"),
+        ]
+
+    queries = []
+    for part_where, part_params, order_by in parts:
+        sql = "SELECT * FROM tasks"
+        if where or part_where:
+            sql += " WHERE " + " AND ".join(where + part_where)
+        sql += f" ORDER BY {order_by}"
+        query_params = params + part_params
+        if limit is not None:
+            sql += " LIMIT ?"
+            query_params.append(limit)
+        queries.append((sql, query_params))
+    return queries
+
+
+#---------------------------------------------------------
+# data-access layer
+#---------------------------------------------------------
+class TaskDB:
+    """
+    Keeps one sqlite3 connection per thread so readers (frontends) and writers (/process_task/)
+    don't open and close a connection on every call. WAL lets reads run while a write is in progress.
+    """
+
+    def __init__(self, path=DB_NAME):
+        self.path = path
+        self.local = threading.local()
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=STATEMENT_CACHE_SIZE, timeout=BUSY_TIMEOUT_MS / 1000)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self.local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self.schema_lock:
+            if self.schema_ready:
+                return
+            with conn:
+                conn.execute(SCHEMA)
+                existing = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+                for column, sql in MIGRATIONS.items():
+                    if column not in existing:
+                        conn.execute(sql)
+                for sql in INDEXES:
+                    conn.execute(sql)
+            self._backfill(conn)
+            if "deadline_band" not in existing:
+                self._fill_deadline_bands(conn)
+            self.schema_ready = True
+
+    def _backfill(self, conn):
+        """Fills deadline_ts / priority_score for rows written before those columns existed."""
+        rows = conn.execute("SELECT * FROM tasks WHERE priority_score IS NULL").fetchall()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            values = dict(zip(COLUMNS, normalized_row(dict(row))))
+            updates.append((values["deadline_ts"], values["priority_score"], values["deadline_band"], row["id"]))
+        with conn:
+            conn.executemany(
+                "UPDATE tasks SET deadline_ts = ?, priority_score = ?, deadline_band = ? WHERE id = ?", updates
+            )
+        print(f"Backfilled normalized columns for {len(updates)} tasks")
+
+    def _fill_deadline_bands(self, conn):
+        """Existing scores are taken as counting the band each task is in now, so they aren't raised again."""
+        now = time.time()
+        rows = conn.execute("SELECT id, deadline_ts FROM tasks WHERE deadline_ts IS NOT NULL").fetchall()
+        updates = [(deadline_band(row["deadline_ts"], now), row["id"]) for row in rows]
+        with conn:
+            conn.executemany("UPDATE tasks SET deadline_band = ? WHERE id = ?", updates)
+
+    def close(self):
+        """Closes this thread's connection."""
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    #-----------------------------------------------------
+    # writes
+    #-----------------------------------------------------
+    def insert_task(self, task: Dict) -> int:
+        conn = self.connection()
+        with conn:
+            cursor = conn.execute(INSERT_SQL, normalized_row(task))
+        return cursor.lastrowid
+
+    def insert_tasks(self, tasks: Iterable, chunk_size: int = INSERT_CHUNK_SIZE,
+                     transform: Optional[Callable] = None) -> Tuple[List[Optional[int]], List[Tuple[int, str]]]:
+        """
+        Streams tasks into executemany, one transaction per chunk of chunk_size rows.
+        transform (optional) turns each item into a task dict first.
+        Returns (ids, failures): ids[i] is the new id of item i or None if it failed,
+        failures lists (i, error message). A bad row never aborts the rest of the import.
+        """
+        conn = self.connection()
+        ids = []
+        failures = []
+        chunk = []
+        deadline_cache = {}
+        for position, item in enumerate(tasks):
+            ids.append(None)
+            try:
+                chunk.append((position, normalized_row(transform(item) if transform else item, deadline_cache)))
+            except Exception as e:
+                failures.append((position, f"{type(e).__name__}: {e}"))
+                continue
+            if len(chunk) >= chunk_size:
+                self._insert_chunk(conn, chunk, ids, failures)
+                chunk = []
+        if chunk:
+            self._insert_chunk(conn, chunk, ids, failures)
+        return ids, failures
+
+    def _insert_chunk(self, conn, chunk, ids, failures):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(INSERT_SQL, [values for _, values in chunk])
+            # the write lock is held, so the chunk got consecutive AUTOINCREMENT ids
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            self._insert_rows(conn, chunk, ids, failures)
+            return
+        first_id = last_id - len(chunk) + 1
+        for offset, (position, _) in enumerate(chunk):
+            ids[position] = first_id + offset
+
+    def _insert_rows(self, conn, chunk, ids, failures):
+        """Slow path for a chunk that failed as a whole: insert row by row and record the bad ones."""
+        with conn:
+            for position, values in chunk:
+                try:
+                    ids[position] = conn.execute(INSERT_SQL, values).lastrowid
+                except sqlite3.Error as e:
+                    failures.append((position, f"{type(e).__name__}: {e}"))
+
+    def update_task(self, task_id: int, fields: Dict) -> bool:
+        """Updates the given columns. Raises ValueError for unknown columns, returns False if the task doesn't exist."""
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown task fields: {', '.join(sorted(unknown))}")
+        if not fields:
+            return self.get_task(task_id) is not None
+
+        # keep the normalized columns in step with the text they come from
+        fields = dict(fields)
+        if "deadline" in fields and "deadline_ts" not in fields:
+            fields["deadline_ts"] = deadline_timestamp(fields["deadline"])
+        if "deadline_ts" in fields and "deadline_band" not in fields:
+            # the stored score is kept, it counts the new deadline's band from now on
+            fields["deadline_band"] = deadline_band(fields["deadline_ts"])
+        if "priority" in fields and "priority_score" not in fields:
+            fields["priority_score"] = priority_score_for(fields["priority"])
+
+        # sort the columns so the same update shape reuses the same cached statement
+        columns = sorted(fields)
+        sql = f"UPDATE tasks SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+        conn = self.connection()
+        with conn:
+            cursor = conn.execute(sql, [fields[column] for column in columns] + [task_id])
+        return cursor.rowcount > 0
+
+    def delete_task(self, task_id: int) -> bool:
+        conn = self.connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return cursor.rowcount > 0
+
+    #-----------------------------------------------------
+    # reads
+    #-----------------------------------------------------
+    def get_task(self, task_id: int) -> Optional[Dict]:
+        row = self.connection().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_tasks(self) -> List[Dict]:
+        rows = self.connection().execute("SELECT * FROM tasks").fetchall()
+        return [dict(row) for row in rows]
+
+    def priorities_for_events(self, event_ids) -> Dict[str, str]:
+        """{calendar event id: high/medium/low} for events created by /process_task/."""
+        event_ids = [event_id for event_id in event_ids if event_id]
+        if not event_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in event_ids)
+        rows = self.connection().execute(
+            f"SELECT event_id, priority, priority_score FROM tasks WHERE event_id IN ({placeholders})", event_ids
+        )
+        return {row["event_id"]: priority_level(row["priority"], row["priority_score"]) for row in rows}
+
+    def scoring_rows(self, task_ids=None, deadline_from=None, deadline_to=None) -> List[Dict]:
+        """
+        id, task, priority, deadline_ts, priority_score and deadline_band of the given tasks, or of every task with a
+        deadline in [deadline_from, deadline_to] (unix timestamps, uses the deadline index).
+        """
+        conn = self.connection()
+        columns = "id, task, priority, deadline_ts, priority_score, deadline_band"
+        if task_ids is not None:
+            task_ids = list(task_ids)
+            rows = []
+            # stay well below SQLite's bound-parameter limit
+            for i in range(0, len(task_ids), 500):
+                chunk = task_ids[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows += conn.execute(f"SELECT {columns} FROM tasks WHERE id IN ({placeholders})", chunk).fetchall()
+            return [dict(row) for row in rows]
+
+        where = [f"{DEADLINE_KEY} < 9e15"]
+        params = []
+        if deadline_from is not None:
+            where.append(f"{DEADLINE_KEY} >= ?")
+            params.append(deadline_from)
+        if deadline_to is not None:
+            where.append(f"{DEADLINE_KEY} <= ?")
+            params.append(deadline_to)
+        rows = conn.execute(f"SELECT {columns} FROM tasks WHERE {' AND '.join(where)}", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def update_priority_scores(self, updates: Iterable[Tuple[int, Optional[int], int]]) -> int:
+        """Bulk update of (priority_score, deadline_band, id) tuples in one transaction. Returns the number of tuples."""
+        updates = list(updates)
+        if not updates:
+            return 0
+        conn = self.connection()
+        with conn:
+            conn.executemany("UPDATE tasks SET priority_score = ?, deadline_band = ? WHERE id = ?", updates)
+        return len(updates)
+
+    def _after_key(self, conn, sort, after_id):
+        if after_id is None or sort == "id":
+            return None
+        key = SORTS[sort][0]
+        row = conn.execute(f"SELECT {key} FROM tasks WHERE id = ?", (after_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Task {after_id} not found")
+        return row[0]
+
+    def query_tasks(self, limit=100, sort="id", after_id=None, **filters) -> List[Dict]:
+        """One page of tasks, filtered by priority / intent / deadline range and sorted by sort."""
+        conn = self.connection()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after_key = self._after_key(conn, sort, after_id)
+        rows = []
+        for sql, params in build_queries(sort=sort, after_id=after_id, after_key=after_key, limit=limit, **filters):
+            rows += [dict(row) for row in conn.execute(sql, params)]
+            if len(rows) >= limit:
+                break
+        return rows[:limit]
+
+    def iter_tasks(self, sort="id", after_id=None, limit=None, fetch_size=500, **filters) -> Iterator[Dict]:
+        """
+        Streams matching tasks without building the whole list.
+        Bad arguments raise here, before the first row is produced.
+        """
+        after_key = self._after_key(self.connection(), sort, after_id)
+        queries = build_queries(sort=sort, after_id=after_id, after_key=after_key, limit=limit, **filters)
+        return self._stream(queries, limit, fetch_size)
+
+    def _stream(self, queries, limit, fetch_size):
+        # own connection, a streaming response may be iterated from different threads
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        remaining = limit
+        try:
+            for sql, params in queries:
+                if remaining == 0:
+                    break
+                cursor = conn.execute(sql, params)
+                while remaining is None or remaining > 0:
+                    rows = cursor.fetchmany(fetch_size if remaining is None else min(fetch_size, remaining))
+                    if not rows:
+                        break
+                    if remaining is not None:
+                        remaining -= len(rows)
+                    for row in rows:
+                        yield dict(row)
+        finally:
+            conn.close()
+
+# shared instance used by the API and db_management
+task_db = TaskDB()
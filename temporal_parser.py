@@ -0,0 +1,130 @@
+#this file turns time / deadline strings into datetimes, parsing each distinct string only once
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from stage_metrics import timed
+# dateparser is slow to import, so it is only imported when the fast path can't handle a string
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+CACHE_SIZE = 1024          # distinct (text, reference bucket) pairs kept in memory
+BUCKET_SECONDS = 60        # relative dates ("tomorrow", "in 2 hours") are resolved per minute
+
+DATEPARSER_SETTINGS = {'PREFER_DATES_FROM': 'future'}
+
+# same patterns the priority / scheduling code already relied on
+TIME_PATTERN = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s?(am|pm)\b')
+ORDINAL_PATTERN = re.compile(r'(\d+)(st|nd|rd|th)', flags=re.IGNORECASE)
+SIMPLE_PATTERN = re.compile(
+    r'^(?:(today|tomorrow)\s*)?(?:at\s+)?(?:(\d{1,2})(?::(\d{2}))?\s?(am|pm))?$'
+)
+
+_fast_path_hits = 0
+
+
+#---------------------------------------------------------
+# helper functions
+#---------------------------------------------------------
+def normalize(text):
+    """Lowercases, strips ordinal suffixes ('5th' -> '5') and collapses whitespace."""
+    text = ORDINAL_PATTERN.sub(r'\1', text.lower())
+    return " ".join(text.split())
+
+
+def extract_clock_time(text):
+    """Returns (hour, minute) in 24h format for the first '7pm' / '7:30 am' in text, or None."""
+    match = TIME_PATTERN.search(text.lower())
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridian = match.group(3)
+    if meridian == 'pm' and hour != 12:
+        hour += 12
+    elif meridian == 'am' and hour == 12:
+        hour = 0
+    return hour, minute
+
+
+def _reference_bucket(reference):
+    reference = reference or datetime.now()
+    return int(reference.timestamp()) // BUCKET_SECONDS
+
+
+def _fast_parse(normalized, now):
+    """
+    Handles plain '11pm', 'tomorrow 5pm', 'today at 7:30 am' without dateparser.
+    Returns None when the text needs the full parser.
+    """
+    match = SIMPLE_PATTERN.match(normalized)
+    if not match or not normalized:
+        return None
+
+    day_word, hour, minute, meridian = match.groups()
+    if day_word is None and hour is None:
+        return None
+    if hour is None:
+        return now + timedelta(days=1) if day_word == "tomorrow" else now
+
+    hour, minute = extract_clock_time(f"{hour}:{minute or '00'}{meridian}")
+    if hour > 23 or minute > 59:
+        return None
+    result = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if day_word == "tomorrow":
+        result += timedelta(days=1)
+    elif day_word is None and result < now:
+        # time already passed today, assume tomorrow
+        result += timedelta(days=1)
+    return result
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_cached(normalized, bucket):
+    global _fast_path_hits
+    now = datetime.fromtimestamp(bucket * BUCKET_SECONDS)
+
+    parsed = _fast_parse(normalized, now)
+    if parsed is not None:
+        _fast_path_hits += 1
+        return parsed
+
+    import dateparser
+    settings = dict(DATEPARSER_SETTINGS, RELATIVE_BASE=now)
+    with timed("dateparser"):
+        return dateparser.parse(normalized, settings=settings)
+
+
+#---------------------------------------------------------
+# public helpers
+#---------------------------------------------------------
+def parse_datetime(text, reference=None):
+    """
+    Parses a natural-language date/time like '11pm', 'tomorrow 5am' or '8th September'.
+    Results are cached per normalized text and per minute of the reference time.
+    Returns a datetime, or None if the text has no date in it.
+    """
+    if not text:
+        return None
+    return _parse_cached(normalize(text), _reference_bucket(reference))
+
+
+def cache_stats():
+    info = _parse_cached.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "fast_path": _fast_path_hits,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+def clear_cache():
+    global _fast_path_hits
+    _parse_cached.cache_clear()
+    _fast_path_hits = 0
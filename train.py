@@ -0,0 +1,302 @@
+#this file trains the intent classifier and the spaCy NER model from the data files in data/ (replaces running models.ipynb)
+#every run writes a new timestamped version to models/versions/ with a manifest, then makes it the active one;
+#a running API notices models/CURRENT changed, loads the new version in the background and swaps it in
+
+#---------------------------------------------------------
+#import libraries
+#---------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import time
+from datetime import datetime
+from model_registry import (VERSIONS_DIR, MANIFEST_FILE, INTENT_FILE, ENTITY_DIR, artifact_hash, artifact_paths,
+                            activate_version, active_version, list_versions)
+
+#---------------------------------------------------------
+# settings
+#---------------------------------------------------------
+DATA_DIR = "data"
+INTENT_TRAIN_FILE = "intent_train.jsonl"   # {"text", "intent"} per line
+INTENT_TEST_FILE = "intent_test.jsonl"
+NER_TRAIN_FILE = "ner_train.jsonl"         # {"text", "entities": [[start, end, label], ...]} per line
+
+SEED = 0
+DEV_FRACTION = 0.2      # share of the distinct NER sentences held out for early stopping
+MAX_EPOCHS = 100
+PATIENCE = 10           # epochs without a better dev F-score before training stops
+DROPOUT = 0.25
+BATCH_START = 4.0       # minibatch sizes grow from BATCH_START to BATCH_STOP by BATCH_COMPOUND per batch
+BATCH_STOP = 32.0
+BATCH_COMPOUND = 1.001
+
+
+#---------------------------------------------------------
+# data
+#---------------------------------------------------------
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def data_files(data_dir=DATA_DIR):
+    return [os.path.join(data_dir, name) for name in (INTENT_TRAIN_FILE, INTENT_TEST_FILE, NER_TRAIN_FILE)]
+
+
+def split_dev(rows, fraction, seed):
+    """(train, dev) with every copy of a sentence on the same side, so dev sentences are never trained on."""
+    texts = sorted({row["text"] for row in rows})
+    random.Random(seed).shuffle(texts)
+    dev_texts = set(texts[:round(len(texts) * fraction)])
+    return [row for row in rows if row["text"] not in dev_texts], [row for row in rows if row["text"] in dev_texts]
+
+
+def ner_examples(nlp, rows):
+    """spaCy Examples; spans that don't fall on token boundaries are skipped, as in the notebook."""
+    from spacy.training import Example
+    examples = []
+    for row in rows:
+        doc = nlp.make_doc(row["text"])
+        entities = []
+        for start, end, label in row["entities"]:
+            if doc.char_span(start, end, label=label) is None:
+                print(f"⚠ Skipping span '{row['text'][start:end]}' in '{row['text']}': not aligned to tokens")
+            else:
+                entities.append((start, end, label))
+        examples.append(Example.from_dict(doc, {"entities": entities}))
+    return examples
+
+
+#---------------------------------------------------------
+# training
+#---------------------------------------------------------
+def train_intent(train_rows, test_rows):
+    """TF-IDF + LogisticRegression, as in the notebook. Returns (pipeline, metrics on the test file)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.pipeline import Pipeline
+
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer()),
+        ("clf", LogisticRegression()),
+    ])
+    pipeline.fit([row["text"] for row in train_rows], [row["intent"] for row in train_rows])
+
+    expected = [row["intent"] for row in test_rows]
+    predicted = list(pipeline.predict([row["text"] for row in test_rows]))
+    metrics = {
+        "train_examples": len(train_rows),
+        "test_examples": len(test_rows),
+        "accuracy": round(accuracy_score(expected, predicted), 4),
+        "macro_f1": round(f1_score(expected, predicted, average="macro"), 4),
+    }
+
+    # the fitted vocabulary's order depends on string hashing and sklearn caches an id() of the stop word list;
+    # with the one sorted and the other dropped the pickle (and so the model version) is the same on every run
+    vectorizer = pipeline.named_steps["tfidf"]
+    vectorizer.vocabulary_ = dict(sorted(vectorizer.vocabulary_.items()))
+    vectorizer.__dict__.pop("_stop_words_id", None)
+    return pipeline, metrics
+
+
+def train_ner(rows, dev_fraction=DEV_FRACTION, max_epochs=MAX_EPOCHS, patience=PATIENCE, seed=SEED):
+    """
+    Blank English pipeline with one NER pipe, trained on minibatches of compounding size.
+    After every epoch the model is scored on the held-out sentences; training stops after `patience`
+    epochs without a better F-score and the best epoch's (averaged) weights are kept.
+    Returns (nlp, metrics).
+    """
+    import spacy
+    from spacy.util import compounding, fix_random_seed, minibatch
+
+    fix_random_seed(seed)
+    rng = random.Random(seed)
+    nlp = spacy.blank("en")
+    ner = nlp.add_pipe("ner")
+    for label in sorted({label for row in rows for _, _, label in row["entities"]}):
+        ner.add_label(label)
+
+    train_rows, dev_rows = split_dev(rows, dev_fraction, seed)
+    train_examples = ner_examples(nlp, train_rows)
+    dev_examples = ner_examples(nlp, dev_rows) if dev_rows else train_examples
+    optimizer = nlp.initialize(lambda: train_examples)
+
+    batch_sizes = compounding(BATCH_START, BATCH_STOP, BATCH_COMPOUND)
+    best = {"ents_f": -1.0}
+    best_epoch = 0
+    best_bytes = None
+    epoch = 0
+    for epoch in range(1, max_epochs + 1):
+        rng.shuffle(train_examples)
+        losses = {}
+        for batch in minibatch(train_examples, size=batch_sizes):
+            nlp.update(batch, drop=DROPOUT, sgd=optimizer, losses=losses)
+
+        with nlp.use_params(optimizer.averages):
+            scores = nlp.evaluate(dev_examples)
+            if (scores["ents_f"] or 0.0) > best["ents_f"]:
+                best, best_epoch, best_bytes = scores, epoch, nlp.to_bytes()
+        print(f"epoch {epoch:>3}  loss {losses.get('ner', 0.0):>9.3f}  dev F {scores['ents_f'] or 0.0:.3f}")
+        if epoch - best_epoch >= patience:
+            print(f"no better dev F-score for {patience} epochs, stopping")
+            break
+
+    nlp.from_bytes(best_bytes)
+    metrics = {
+        "train_examples": len(train_examples),
+        "dev_examples": len(dev_examples) if dev_rows else 0,
+        "epochs": epoch,
+        "best_epoch": best_epoch,
+        "dev_precision": round(best["ents_p"] or 0.0, 4),
+        "dev_recall": round(best["ents_r"] or 0.0, 4),
+        "dev_f1": round(best["ents_f"] or 0.0, 4),
+        "dev_per_type": {
+            label: {key: round(value, 4) for key, value in scores.items()}
+            for label, scores in (best.get("ents_per_type") or {}).items()
+        },
+    }
+    return nlp, metrics
+
+
+#---------------------------------------------------------
+# artifacts
+#---------------------------------------------------------
+def new_version_name():
+    name = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while os.path.exists(os.path.join(VERSIONS_DIR, name if suffix == 1 else f"{name}-{suffix}")):
+        suffix += 1
+    return name if suffix == 1 else f"{name}-{suffix}"
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def save_version(name, pipeline, nlp, manifest):
+    """
+    Writes the models, their compiled / packed copies and the manifest to a hidden staging directory,
+    then renames it into models/versions/<name>: a version directory is always complete.
+    """
+    import joblib
+    from entity_model import PACKED_ENTITY_PATH, pack_entity_model
+    from intent_engine import COMPILED_INTENT_PATH, export_intent_classifier
+
+    staging = os.path.join(VERSIONS_DIR, f".{name}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        intent_path, entity_path = artifact_paths(staging)
+        joblib.dump(pipeline, intent_path)
+        nlp.to_disk(entity_path)
+        export_intent_classifier(intent_path, os.path.join(staging, os.path.basename(COMPILED_INTENT_PATH)))
+        pack_entity_model(entity_path, os.path.join(staging, os.path.basename(PACKED_ENTITY_PATH)))
+
+        digest = artifact_hash((intent_path, entity_path))
+        manifest.update({"hash": digest, "model_version": digest[:12]})
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(staging, os.path.join(VERSIONS_DIR, name))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return os.path.join(VERSIONS_DIR, name)
+
+
+def train(data_dir=DATA_DIR, dev_fraction=DEV_FRACTION, max_epochs=MAX_EPOCHS, patience=PATIENCE, seed=SEED,
+          activate=True):
+    """Trains both models, saves them as a new version and (by default) activates it. Returns the manifest."""
+    started = time.perf_counter()
+    name = new_version_name()
+    intent_train, intent_test, ner_rows = (read_jsonl(path) for path in data_files(data_dir))
+
+    start = time.perf_counter()
+    pipeline, intent_metrics = train_intent(intent_train, intent_test)
+    intent_seconds = time.perf_counter() - start
+    print(f"✅ Intent classifier: accuracy {intent_metrics['accuracy']}, macro F1 {intent_metrics['macro_f1']} "
+          f"on {intent_metrics['test_examples']} test sentences")
+
+    start = time.perf_counter()
+    nlp, ner_metrics = train_ner(ner_rows, dev_fraction, max_epochs, patience, seed)
+    ner_seconds = time.perf_counter() - start
+    print(f"✅ NER: dev F1 {ner_metrics['dev_f1']} at epoch {ner_metrics['best_epoch']} of {ner_metrics['epochs']}")
+
+    import sklearn
+    import spacy
+    manifest = {
+        "version": name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "data": {os.path.basename(path): artifact_hash((path,)) for path in data_files(data_dir)},
+        "data_hash": artifact_hash(data_files(data_dir)),
+        "metrics": {"intent": intent_metrics, "ner": ner_metrics},
+        "train_seconds": {
+            "intent": round(intent_seconds, 3),
+            "ner": round(ner_seconds, 3),
+            "total": round(time.perf_counter() - started, 3),
+        },
+        "settings": {
+            "seed": seed,
+            "dev_fraction": dev_fraction,
+            "max_epochs": max_epochs,
+            "patience": patience,
+            "dropout": DROPOUT,
+            "batch_sizes": [BATCH_START, BATCH_STOP, BATCH_COMPOUND],
+        },
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "spacy": spacy.__version__,
+        "sklearn": sklearn.__version__,
+    }
+    path = save_version(name, pipeline, nlp, manifest)
+    print(f"✅ Saved model version {name} ({manifest['model_version']}) to {path}")
+    if activate:
+        activate_version(name)
+        print(f"✅ {name} is now the active version")
+    return manifest
+
+
+def print_versions():
+    active = active_version()
+    for manifest in list_versions():
+        metrics = manifest["metrics"]
+        marker = "*" if manifest["version"] == active else " "
+        print(f"{marker} {manifest['version']}  {manifest['model_version']}  "
+              f"intent acc {metrics['intent']['accuracy']}  ner dev F1 {metrics['ner']['dev_f1']}  "
+              f"{manifest['train_seconds']['total']}s")
+    if active is None:
+        print(f"* models in models/ ({INTENT_FILE}, {ENTITY_DIR})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the intent and NER models into a new model version.")
+    parser.add_argument("--data", default=DATA_DIR)
+    parser.add_argument("--dev-fraction", type=float, default=DEV_FRACTION)
+    parser.add_argument("--max-epochs", type=int, default=MAX_EPOCHS)
+    parser.add_argument("--patience", type=int, default=PATIENCE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--no-activate", action="store_true", help="save the new version without switching to it")
+    parser.add_argument("--activate", metavar="VERSION",
+                        help="switch to an existing version instead of training ('none' for the models in models/)")
+    parser.add_argument("--list", action="store_true", help="list the trained versions")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print_versions()
+    elif args.activate:
+        version = None if args.activate.lower() == "none" else args.activate
+        activate_version(version)
+        print(f"✅ Active models: {version or 'models/'}")
+    else:
+        train(args.data, args.dev_fraction, args.max_epochs, args.patience, args.seed, activate=not args.no_activate)
+
+
+if __name__ == "__main__":
+    main()